@@ -1,27 +1,107 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, abort
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from markupsafe import Markup
+from sqlalchemy import and_, bindparam, case, event, exists, func, insert, or_, select, text, tuple_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+from assets import AssetManifest
+from httpcache import SKIP_COMPRESSION, CompressionMiddleware
+from curriculum import CurriculumError, chunked, content_hash, iter_records
+from leaderboard import Leaderboard
+from pagination import decode_cursor, split_page
+from passwords import DEFAULT_METHOD, HashingOverloaded, PasswordHasher
+from prerequisites import PrerequisiteGraph
+from rollups import SCORE_BUCKETS, Schedule, bucket_label, insert_missing, score_bucket, upsert
+from search import HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN, highlight, like_pattern, match_expression, strip_html
+from database import configure_database, retry_on_lock
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics, instrument_engine, instrument_flask
+from datetime import date, datetime, timedelta
+from collections import Counter, OrderedDict, namedtuple
+import atexit
+import click
+import functools
+import operator
 import os
 import json
+import threading
+import time
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'mlops-learning-app-2024'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///mlops_learning.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app)
 
 db = SQLAlchemy(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Request metrics, served from /metrics
+request_metrics = RequestMetrics(
+    slow_seconds=float(os.environ.get('SLOW_REQUEST_SECONDS', 0.5)),
+    slow_queries=int(os.environ.get('SLOW_REQUEST_QUERIES', 50))
+)
+instrument_flask(app, request_metrics)
+instrument_engine(Engine, request_metrics)
+
+# Fingerprinted static files: url_for('static') links to the content-hashed
+# name, which is served pre-gzipped with a year-long immutable Cache-Control
+static_assets = AssetManifest(app.static_folder)
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        if app.debug:
+            static_assets.refresh()
+        values['filename'] = static_assets.url_name(values['filename'])
+
+def serve_static(filename):
+    asset, immutable = static_assets.lookup(filename)
+    if asset is None:
+        return app.send_static_file(filename)
+    status, headers, body = asset.response(immutable, request.headers.get('If-None-Match'),
+                                           request.headers.get('Accept-Encoding'))
+    return app.response_class(body, status, headers)
+
+# Gzip, weak ETags and 304s for rendered pages
+app.wsgi_app = CompressionMiddleware(
+    app.wsgi_app,
+    min_size=int(os.environ.get('COMPRESS_MIN_SIZE', 500)),
+    compresslevel=int(os.environ.get('COMPRESS_LEVEL', 6))
+)
+
+def no_compression(view):
+    """Send this view's responses as they are: no gzip, ETag or 304"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request.environ[SKIP_COMPRESSION] = True
+        return view(*args, **kwargs)
+    return wrapper
+
+# Assets carry their own ETag and pre-compressed body
+app.view_functions['static'] = no_compression(serve_static)
+
+def commit_with_retry(work):
+    """Run work() and commit as one transaction, retried on lock contention"""
+    def transaction():
+        result = work()
+        db.session.commit()
+        return result
+    return retry_on_lock(transaction, rollback=db.session.rollback)
+
+password_hasher = PasswordHasher(
+    method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+)
+
 # Database Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     current_level = db.Column(db.String(20), default='beginner')
     current_module = db.Column(db.Integer, default=1)
@@ -37,6 +117,15 @@ class Module(db.Model):
     external_resources = db.Column(db.Text, nullable=True)
     order_num = db.Column(db.Integer, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_module_level_order', 'level', 'order_num'),
+    )
+
+class ModulePrerequisite(db.Model):
+    """module_id stays locked until prerequisite_id is completed"""
+    module_id = db.Column(db.Integer, db.ForeignKey('module.id'), primary_key=True)
+    prerequisite_id = db.Column(db.Integer, db.ForeignKey('module.id'), primary_key=True)
+
 class Progress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -46,6 +135,10 @@ class Progress(db.Model):
     project_completed = db.Column(db.Boolean, default=False)
     last_accessed = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('uq_progress_user_module', 'user_id', 'module_id', unique=True),
+    )
+
 class Achievement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -59,9 +152,25 @@ class UserAchievement(db.Model):
     achievement_id = db.Column(db.Integer, db.ForeignKey('achievement.id'), nullable=False)
     earned_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('uq_user_achievement', 'user_id', 'achievement_id', unique=True),
+    )
+
+class IdempotencyKey(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    key = db.Column(db.String(64), nullable=False)
+    response = db.Column(db.Text, nullable=False)  # JSON string
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('uq_idempotency_user_key', 'user_id', 'key', unique=True),
+        db.Index('ix_idempotency_created', 'created_at'),
+    )
+
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    module_id = db.Column(db.Integer, db.ForeignKey('module.id'), nullable=False)
+    module_id = db.Column(db.Integer, db.ForeignKey('module.id'), nullable=False, index=True)
     question = db.Column(db.Text, nullable=False)
     options = db.Column(db.Text, nullable=False)  # JSON string
     correct_answer = db.Column(db.Integer, nullable=False)
@@ -69,23 +178,834 @@ class Quiz(db.Model):
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    module_id = db.Column(db.Integer, db.ForeignKey('module.id'), nullable=False)
+    module_id = db.Column(db.Integer, db.ForeignKey('module.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     starter_code = db.Column(db.Text, nullable=True)
     solution = db.Column(db.Text, nullable=True)
 
+class CurriculumRecord(db.Model):
+    """The row a curriculum file record was loaded into, and its content hash"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    key = db.Column(db.String(200), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+
+    __table_args__ = (
+        db.Index('uq_curriculum_record_kind_key', 'kind', 'key', unique=True),
+    )
+
+class CacheGeneration(db.Model):
+    """A counter bumped whenever something every process caches changes"""
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class LearningEvent(db.Model):
+    """One thing a learner did; rows are only ever appended"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    module_id = db.Column(db.Integer, db.ForeignKey('module.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    score = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_learning_event_user', 'user_id', 'id'),
+        # Never reuse the id of a deleted row: consumers read past a watermark
+        {'sqlite_autoincrement': True},
+    )
+
+class EventWatermark(db.Model):
+    """The last LearningEvent id a consumer of the log has processed"""
+    name = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+
+# Reporting rollups, maintained from the event log by refresh_rollups()
+class LearnerModuleRollup(db.Model):
+    """When one learner first reached each stage of a module's funnel"""
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    module_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    first_seen_at = db.Column(db.DateTime, nullable=False)
+    first_quiz_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    completion_seconds = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_learner_module_rollup_completion', 'module_id', 'completion_seconds'),
+    )
+
+class ModuleDailyRollup(db.Model):
+    """Learners who opened, tried the quiz of and completed a module, by day"""
+    day = db.Column(db.Date, primary_key=True)
+    module_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    opened = db.Column(db.Integer, nullable=False, default=0)
+    quizzed = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+
+class ModuleRollup(db.Model):
+    """All-time completion count and median time from first view to completion"""
+    module_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    completions = db.Column(db.Integer, nullable=False, default=0)
+    median_completion_seconds = db.Column(db.Float, nullable=True)
+
+class QuizScoreRollup(db.Model):
+    """Quiz attempts per day, module level and score bucket"""
+    day = db.Column(db.Date, primary_key=True)
+    level = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+class ActiveLearnerRollup(db.Model):
+    """Each learner who did anything on a day, once"""
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+class DailyActivityRollup(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    active_learners = db.Column(db.Integer, nullable=False, default=0)
+    events = db.Column(db.Integer, nullable=False, default=0)
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used key"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+# User identity cache
+# load_user runs on every authenticated request, so it hands out read-only
+# copies of the user row from a TTL'd LRU instead of querying each time.
+# Users changed through the session, or by the bulk points UPDATE in
+# fold_events (see touch_users), are dropped once the change commits; the
+# TTL bounds how stale another worker process's copy can get.
+class CachedUser(UserMixin, namedtuple('CachedUser', 'id username email created_at current_level current_module total_points')):
+    """The User columns pages read, detached from any session"""
+    __slots__ = ()
+
+class UserIdentityCache:
+    """TTL'd LRU of CachedUser by id.
+
+    Invalidation bumps a version (striped over a fixed number of slots), so
+    a load that raced with a change is returned but not cached.
+    """
+
+    VERSION_SLOTS = 1024
+
+    def __init__(self, max_entries=10000, ttl=30.0):
+        self.ttl = ttl
+        self._entries = LRUCache(max_entries)
+        self._versions = [0] * self.VERSION_SLOTS
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        
+        slot = user_id % self.VERSION_SLOTS
+        version = self._versions[slot]
+        row = db.session.query(*(getattr(User, field) for field in CachedUser._fields)).filter(
+            User.id == user_id
+        ).first()
+        if row is None:
+            return None
+        user = CachedUser(*row)
+        if self.ttl > 0:
+            with self._lock:
+                if self._versions[slot] == version:
+                    self._entries.put(user_id, (time.monotonic() + self.ttl, user))
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions[user_id % self.VERSION_SLOTS] += 1
+            self._entries.invalidate(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._versions = [version + 1 for version in self._versions]
+            self._entries.clear()
+
+user_identities = UserIdentityCache(
+    max_entries=int(os.environ.get('USER_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('USER_CACHE_SECONDS', 30))
+)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_identities.get(int(user_id))
+
+def touch_users(user_ids):
+    """Drop these users' cached identities when the session commits (for bulk UPDATEs)"""
+    db.session.info.setdefault('edited_users', set()).update(user_ids)
+
+@event.listens_for(db.session, 'after_flush')
+def collect_edited_users(session, flush_context):
+    edited = session.info.setdefault('edited_users', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            edited.add(obj.id)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_edited_users(session):
+    for user_id in session.info.pop('edited_users', ()):
+        user_identities.invalidate(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_edited_users(session):
+    session.info.pop('edited_users', None)
+
+# Dashboard snapshots
+# Plain tuples rather than ORM rows, so a cached snapshot never touches a session
+ModuleCard = namedtuple('ModuleCard', 'id level title description')
+AchievementCard = namedtuple('AchievementCard', 'name description badge_icon')
+LevelProgress = namedtuple('LevelProgress', 'level completed total')
+DashboardSnapshot = namedtuple('DashboardSnapshot', 'next_module level_progress achievements')
+
+# Per-user, dropped whenever the user's progress or badges change
+dashboard_cache = LRUCache(max_entries=10000)
+
+def build_dashboard_snapshot(user):
+    """Load everything the dashboard shows in a fixed number of queries"""
+    for attempt in range(2):
+        graph = module_graph.get()
+        completed = completed_mask(graph, user.id)
+        recommended = graph.prerequisites.recommend(completed)
+        module = Module.query.get(recommended[0]) if recommended else None
+        if module is not None or not recommended:
+            break
+        # Deleted by another process since this one built the graph
+        module_graph.reset()
+    
+    level_progress = [
+        LevelProgress(level, (completed & mask).bit_count(), mask.bit_count())
+        for level, mask in graph.level_masks.items()
+    ]
+    next_module = None
+    if module is not None:
+        next_module = ModuleCard(module.id, module.level, module.title, module.description)
+    
+    achievements = [
+        AchievementCard(a.name, a.description, a.badge_icon)
+        for a in Achievement.query.join(
+            UserAchievement, UserAchievement.achievement_id == Achievement.id
+        ).filter(UserAchievement.user_id == user.id).order_by(UserAchievement.earned_at)
+    ]
+    
+    return DashboardSnapshot(next_module, level_progress, achievements)
 
 # Routes
+# Module bundles
+# Everything the lesson page shows about a module, materialized once. Content
+# edits flushed through the ORM bump the module's version (see
+# invalidate_edited_modules), which drops the bundle and stops an in-flight
+# load of the old content from being cached.
+ModuleView = namedtuple('ModuleView', 'id level title description content summary external_resources order_num')
+QuizQuestion = namedtuple('QuizQuestion', 'id question options correct_answer explanation')
+ProjectView = namedtuple('ProjectView', 'id title description starter_code solution')
+AnswerKey = namedtuple('AnswerKey', 'question_ids answers explanations')
+ModuleBundle = namedtuple('ModuleBundle', 'module quiz_questions project answer_key version')
+
+def load_module_bundle(module_id, version):
+    module = Module.query.get(module_id)
+    if module is None:
+        return None
+    
+    quiz_questions = tuple(
+        QuizQuestion(q.id, q.question, tuple(json.loads(q.options)), q.correct_answer, q.explanation)
+        for q in Quiz.query.filter_by(module_id=module_id).order_by(Quiz.id)
+    )
+    
+    project = Project.query.filter_by(module_id=module_id).order_by(Project.id).first()
+    if project:
+        project = ProjectView(project.id, project.title, project.description,
+                              project.starter_code, project.solution)
+    
+    # Answers packed one byte per question, compared bytewise when grading
+    answer_key = AnswerKey(
+        tuple(q.id for q in quiz_questions),
+        bytes(q.correct_answer for q in quiz_questions),
+        tuple(q.explanation for q in quiz_questions)
+    )
+    
+    resources = json.loads(module.external_resources) if module.external_resources else []
+    module_view = ModuleView(module.id, module.level, module.title, module.description,
+                             module.content, module.summary, resources, module.order_num)
+    return ModuleBundle(module_view, quiz_questions, project, answer_key, version)
+
+class ModuleBundleCache:
+    """Version-checked LRU of immutable ModuleBundles.
+
+    A version is (epoch, edits): clear() starts a new epoch, so a module
+    never gets a version it had before, even one the cache had not seen.
+    """
+
+    def __init__(self, max_entries=512):
+        self._bundles = LRUCache(max_entries)
+        self._epoch = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, module_id):
+        return (self._epoch, self._versions.get(module_id, 0))
+
+    def get(self, module_id):
+        bundle = self._bundles.get(module_id)
+        if bundle is not None:
+            return bundle
+        
+        version = self.version(module_id)
+        bundle = load_module_bundle(module_id, version)
+        if bundle is not None:
+            with self._lock:
+                # Only cache it if no edit landed while we were loading
+                if self.version(module_id) == version:
+                    self._bundles.put(module_id, bundle)
+        return bundle
+
+    def invalidate(self, module_id):
+        with self._lock:
+            self._versions[module_id] = self._versions.get(module_id, 0) + 1
+            self._bundles.invalidate(module_id)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._versions.clear()
+            self._bundles.clear()
+
+module_bundles = ModuleBundleCache()
+
+# Lesson fragments
+# The parts of learn.html that are the same for every learner (content,
+# resources, quiz, project, sidebar) are rendered once per bundle version
+# and stitched into the per-learner page as ready markup
+LessonFragments = namedtuple('LessonFragments', 'version main sidebar')
+lesson_fragments = LRUCache(max_entries=512)
+
+def render_lesson_fragments(bundle):
+    fragments = lesson_fragments.get(bundle.module.id)
+    if fragments is not None and fragments.version == bundle.version:
+        return fragments
+    
+    context = {'module': bundle.module, 'quiz_questions': bundle.quiz_questions, 'project': bundle.project}
+    fragments = LessonFragments(
+        bundle.version,
+        Markup(render_template('_lesson_main.html', **context)),
+        Markup(render_template('_lesson_sidebar.html', **context))
+    )
+    lesson_fragments.put(bundle.module.id, fragments)
+    return fragments
+
+@event.listens_for(db.session, 'after_flush')
+def collect_edited_modules(session, flush_context):
+    edited = session.info.setdefault('edited_modules', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Module):
+            edited.add(obj.id)
+            session.info['module_graph_changed'] = True
+        elif isinstance(obj, (Quiz, Project)):
+            edited.add(obj.module_id)
+        elif isinstance(obj, ModulePrerequisite):
+            session.info['module_graph_changed'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_edited_modules(session):
+    for module_id in session.info.pop('edited_modules', ()):
+        module_bundles.invalidate(module_id)
+    if session.info.pop('module_graph_changed', False):
+        module_graph.reset()
+        dashboard_cache.clear()
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_edited_modules(session):
+    session.info.pop('edited_modules', None)
+    session.info.pop('module_graph_changed', None)
+
+# Module search
+# An FTS5 table over the visible text of every module (rowid = module id),
+# kept current from session flushes and by the curriculum loader, whose bulk
+# statements bypass the session.
+MODULE_SEARCH_COLUMNS = ('title', 'description', 'summary', 'content')
+SEARCH_PER_PAGE = 10
+SearchHit = namedtuple('SearchHit', 'id level title description snippet')
+
+def module_search_available(conn):
+    if conn.dialect.name != 'sqlite':
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'module_search'"
+    )).first() is not None
+
+def index_modules(conn, module_ids):
+    """(Re)index the given modules from the module table"""
+    if not module_search_available(conn):
+        return
+    modules = Module.__table__
+    for chunk in chunked(module_ids, 500):
+        conn.execute(
+            text('DELETE FROM module_search WHERE rowid IN :ids').bindparams(bindparam('ids', expanding=True)),
+            {'ids': chunk}
+        )
+        documents = [
+            {'id': row.id, **{column: strip_html(getattr(row, column)) for column in MODULE_SEARCH_COLUMNS}}
+            for row in conn.execute(select(modules).where(modules.c.id.in_(chunk)))
+        ]
+        if documents:
+            conn.execute(text(
+                'INSERT INTO module_search (rowid, title, description, summary, content) '
+                'VALUES (:id, :title, :description, :summary, :content)'
+            ), documents)
+
+def build_module_search(conn):
+    """Create the FTS5 table if needed and bring it in line with the module table"""
+    if conn.dialect.name != 'sqlite':
+        return
+    try:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS module_search USING fts5("
+            "title, description, summary, content, "
+            "tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+    except OperationalError as exc:
+        app.logger.warning('Module search is disabled, SQLite was built without FTS5: %s', exc.orig)
+        return
+    # Title matches count most, body text least
+    conn.execute(text(
+        "INSERT INTO module_search (module_search, rank) VALUES ('rank', 'bm25(10.0, 4.0, 2.0, 1.0)')"
+    ))
+    conn.execute(text('DELETE FROM module_search WHERE rowid NOT IN (SELECT id FROM module)'))
+    missing = conn.execute(text(
+        'SELECT id FROM module WHERE id NOT IN (SELECT rowid FROM module_search)'
+    )).scalars().all()
+    index_modules(conn, missing)
+
+@event.listens_for(db.session, 'after_flush')
+def index_flushed_modules(session, flush_context):
+    module_ids = {obj.id for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+                  if isinstance(obj, Module)}
+    if module_ids:
+        index_modules(session.connection(), module_ids)
+
+def search_modules(query, page=1, per_page=SEARCH_PER_PAGE):
+    """Return (hits, total) for one page of modules matching query, best first"""
+    expression = match_expression(query)
+    if expression is None:
+        return [], 0
+    
+    conn = db.session.connection()
+    offset = (page - 1) * per_page
+    if not module_search_available(conn):
+        # No FTS5 (e.g. PostgreSQL): scan the short text columns instead
+        pattern = like_pattern(query)
+        matches = Module.query.filter(or_(Module.title.ilike(pattern, escape='\\'),
+                                          Module.description.ilike(pattern, escape='\\'),
+                                          Module.summary.ilike(pattern, escape='\\')))
+        modules = matches.order_by(Module.level, Module.order_num).offset(offset).limit(per_page)
+        return [SearchHit(module.id, module.level, module.title, module.description,
+                          highlight(module.description)) for module in modules], matches.count()
+    
+    total = conn.execute(
+        text('SELECT count(*) FROM module_search WHERE module_search MATCH :match'),
+        {'match': expression}
+    ).scalar()
+    rows = conn.execute(text(
+        'SELECT module.id, module.level, module.title, module.description, hits.snippet '
+        'FROM (SELECT rowid, rank, snippet(module_search, -1, :open, :close, :ellipsis, 16) AS snippet '
+        '      FROM module_search WHERE module_search MATCH :match '
+        '      ORDER BY rank LIMIT :limit OFFSET :offset) AS hits '
+        'JOIN module ON module.id = hits.rowid '
+        'ORDER BY hits.rank'
+    ), {'match': expression, 'open': HIGHLIGHT_OPEN, 'close': HIGHLIGHT_CLOSE, 'ellipsis': '…',
+        'limit': per_page, 'offset': offset})
+    return [SearchHit(row.id, row.level, row.title, row.description, highlight(row.snippet))
+            for row in rows], total
+
+# Learning event log
+# Lesson views, quiz submissions and completions are appended to
+# learning_event and never changed. Progress and User.total_points are a fold
+# of that log: compact_events() applies everything past the 'progress'
+# watermark in id order, and routes that must answer with the new state fold
+# the learner's own unprocessed events in the same transaction as the append.
+# Folding is idempotent (times and scores only move up, a module completes
+# once), so an event applied by both paths changes nothing the second time
+# and the whole log can be replayed from the start.
+MODULE_VIEWED = 'module_viewed'
+QUIZ_SUBMITTED = 'quiz_submitted'
+MODULE_COMPLETED = 'module_completed'
+PROGRESS_WATERMARK = 'progress'
+
+# Where ids can commit out of order (concurrent writers on PostgreSQL), events
+# younger than this are left for the next pass so a late commit isn't skipped
+EVENT_SETTLE_SECONDS = float(os.environ.get('EVENT_SETTLE_SECONDS', 2))
+
+FoldResult = namedtuple('FoldResult', 'completed scored new_achievements')
+
+def append_events(conn, rows):
+    """Append events given as dicts with user_id, module_id, kind and optionally score and created_at"""
+    now = datetime.utcnow()
+    conn.execute(insert(LearningEvent), [
+        {'score': None, 'created_at': now, **row} for row in rows
+    ])
+
+def read_watermark(name):
+    return db.session.query(EventWatermark.last_event_id).filter_by(name=name).scalar() or 0
+
+def write_watermark(name, last_event_id):
+    moved = db.session.execute(
+        update(EventWatermark).where(EventWatermark.name == name).values(
+            last_event_id=last_event_id
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if not moved:
+        db.session.execute(insert(EventWatermark).values(name=name, last_event_id=last_event_id))
+
+def events_after(watermark_name, *columns):
+    """Select the settled events past a watermark, in id order"""
+    query = select(*columns).where(LearningEvent.id > read_watermark(watermark_name))
+    if db.session.get_bind().dialect.name != 'sqlite':
+        settled = datetime.utcnow() - timedelta(seconds=EVENT_SETTLE_SECONDS)
+        query = query.where(LearningEvent.created_at < settled)
+    return query.order_by(LearningEvent.id)
+
+def fold_events(events):
+    """Apply events to Progress, points and badges; the caller commits.
+    
+    Only a learner's first quiz attempt on a module counts; later attempts
+    are logged but leave the stored score alone. Returns the (user_id,
+    module_id) pairs completed for the first time, the pairs whose quiz score
+    was recorded, and {user_id: [achievement ids]}.
+    """
+    touched = {}
+    first_attempts = {}
+    completions = set()
+    for row in events:
+        key = (row.user_id, row.module_id)
+        if key not in touched or touched[key] < row.created_at:
+            touched[key] = row.created_at
+        if row.kind == QUIZ_SUBMITTED and row.score is not None:
+            if key not in first_attempts or row.id < first_attempts[key][0]:
+                first_attempts[key] = (row.id, row.score)
+        elif row.kind == MODULE_COMPLETED:
+            completions.add(key)
+    if not touched:
+        return FoldResult(set(), set(), {})
+    
+    # Every event means the module was opened
+    upsert_last_accessed(db.session.connection(), [
+        {'user_id': user_id, 'module_id': module_id, 'last_accessed': when}
+        for (user_id, module_id), when in touched.items()
+    ])
+    
+    # The log is append-only, so an attempt is the first exactly when no
+    # earlier QUIZ_SUBMITTED row exists; replaying it rewrites the same score
+    scored = set()
+    for (user_id, module_id), (event_id, score) in first_attempts.items():
+        earlier = exists().where(
+            LearningEvent.user_id == user_id, LearningEvent.module_id == module_id,
+            LearningEvent.kind == QUIZ_SUBMITTED, LearningEvent.id < event_id
+        )
+        if db.session.execute(
+            update(Progress).where(
+                Progress.user_id == user_id, Progress.module_id == module_id,
+                or_(Progress.quiz_score == None, Progress.quiz_score != score), ~earlier
+            ).values(quiz_score=score).execution_options(synchronize_session=False)
+        ).rowcount:
+            scored.add((user_id, module_id))
+    
+    # The completed flag only flips once, so repeated completions award nothing
+    completed = set()
+    for user_id, module_id in completions:
+        if db.session.execute(
+            update(Progress).where(
+                Progress.user_id == user_id, Progress.module_id == module_id,
+                Progress.completed == False
+            ).values(completed=True).execution_options(synchronize_session=False)
+        ).rowcount:
+            completed.add((user_id, module_id))
+    points = Counter(user_id for user_id, _ in completed)
+    for user_id, count in points.items():
+        db.session.execute(
+            update(User).where(User.id == user_id).values(
+                total_points=User.total_points + count * MODULE_COMPLETION_POINTS
+            ).execution_options(synchronize_session=False)
+        )
+    touch_users(points)
+    
+    new_achievements = {}
+    for user_id in sorted({user_id for user_id, _ in scored | completed}):
+        awarded = achievement_engine.award(user_id)
+        if awarded:
+            new_achievements[user_id] = awarded
+    return FoldResult(completed, scored, new_achievements)
+
+def fold_user_events(user_id):
+    """Fold one learner's events past the watermark; the caller commits"""
+    events = db.session.execute(
+        select(LearningEvent.__table__).where(
+            LearningEvent.user_id == user_id,
+            LearningEvent.id > read_watermark(PROGRESS_WATERMARK)
+        ).order_by(LearningEvent.id)
+    ).all()
+    return fold_events(events)
+
+def publish_fold(result):
+    """Refresh caches once a fold has been committed"""
+    for user_id in {user_id for user_id, _ in result.completed} | set(result.new_achievements):
+        dashboard_cache.invalidate(user_id)
+    scorers = {user_id for user_id, _ in result.completed}
+    if scorers and leaderboard.loaded:
+        for user in User.query.filter(User.id.in_(scorers)):
+            sync_leaderboard(user)
+
+def compact_events(batch_size=1000, replay=False):
+    """Fold every event past the progress watermark; return how many were read.
+    
+    replay=True starts again from the first event. Rows that already match
+    the log are left alone; a completion missing from Progress is recorded,
+    and its points awarded, again.
+    """
+    if replay:
+        commit_with_retry(lambda: write_watermark(PROGRESS_WATERMARK, 0))
+    
+    def step():
+        events = db.session.execute(
+            events_after(PROGRESS_WATERMARK, LearningEvent.__table__).limit(batch_size)
+        ).all()
+        if not events:
+            return 0, None
+        result = fold_events(events)
+        write_watermark(PROGRESS_WATERMARK, events[-1].id)
+        return len(events), result
+    
+    total = 0
+    failures = 0
+    while True:
+        try:
+            count, result = commit_with_retry(step)
+        except IntegrityError:
+            # A route folding the same learner awarded a badge first, or
+            # another compactor created the watermark; the retry sees it
+            db.session.rollback()
+            failures += 1
+            if failures > 2:
+                raise
+            continue
+        if not count:
+            return total
+        publish_fold(result)
+        total += count
+        if count < batch_size:
+            return total
+
+@app.cli.command('compact-events')
+@click.option('--replay', is_flag=True, help='Fold the whole log again from the first event.')
+@click.option('--batch-size', default=1000, show_default=True, help='Events folded per transaction.')
+def compact_events_command(replay, batch_size):
+    """Fold new learning events into progress, points and badges"""
+    print(f'Folded {compact_events(batch_size, replay=replay)} events')
+
+def has_opened_module(user_id, module_id):
+    """True once the learner has viewed the module, even if the view isn't folded yet"""
+    if access_buffer.pending_time(user_id, module_id):
+        return True
+    progress = exists().where(Progress.user_id == user_id, Progress.module_id == module_id)
+    viewed = exists().where(LearningEvent.user_id == user_id, LearningEvent.module_id == module_id,
+                            LearningEvent.kind == MODULE_VIEWED)
+    return db.session.query(or_(progress, viewed)).scalar()
+
+# Last-accessed write-behind
+def upsert_last_accessed(conn, rows):
+    """Create or touch Progress rows, never moving last_accessed backwards"""
+    dialect = conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(Progress)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'module_id'],
+            set_={'last_accessed': stmt.excluded.last_accessed},
+            where=or_(Progress.last_accessed == None,
+                      Progress.last_accessed < stmt.excluded.last_accessed)
+        )
+        conn.execute(stmt, rows)
+        return
+    
+    table = Progress.__table__
+    for row in rows:
+        result = conn.execute(table.update().where(
+            table.c.user_id == row['user_id'], table.c.module_id == row['module_id']
+        ).values(last_accessed=row['last_accessed']))
+        if result.rowcount == 0:
+            conn.execute(table.insert().values(**row))
+
+class AccessTimeBuffer:
+    """Write-behind buffer for lesson views.
+
+    Views are coalesced in memory per (user_id, module_id), keeping the
+    latest time, and appended to the event log in one batched insert every
+    flush_interval seconds, as soon as max_pending keys are waiting, and at
+    exit; each flush then compacts the log into Progress. Flushes run on a
+    background thread so a request never holds one pooled connection while
+    waiting for another.
+    """
+
+    def __init__(self, flush_interval=5.0, max_pending=1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.app = None
+        self._pending = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        atexit.register(self.stop)
+
+    def record(self, user_id, module_id, when=None):
+        when = when or datetime.utcnow()
+        key = (user_id, module_id)
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous is None or previous < when:
+                self._pending[key] = when
+            full = len(self._pending) >= self.max_pending
+        
+        if not self._start():
+            self.flush()
+        elif full:
+            self._wake.set()
+
+    def pending_time(self, user_id, module_id):
+        """Return the buffered or in-flight view time for a key, if any"""
+        key = (user_id, module_id)
+        # Under the lock, so a view moving from pending to in flight is
+        # never missed by looking at both in between
+        with self._lock:
+            return self._pending.get(key) or self._in_flight.get(key)
+
+    def flush(self):
+        """Append pending views to the event log and compact it; return how many views were written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+            if batch:
+                rows = [{'user_id': user_id, 'module_id': module_id, 'kind': MODULE_VIEWED, 'created_at': when}
+                        for (user_id, module_id), when in batch.items()]
+                def write():
+                    with db.engine.begin() as conn:
+                        append_events(conn, rows)
+                
+                try:
+                    with self.app.app_context():
+                        retry_on_lock(write)
+                except Exception:
+                    # Keep the views for the next attempt unless newer ones arrived
+                    with self._lock:
+                        for key, when in batch.items():
+                            if self._pending.get(key, when) <= when:
+                                self._pending[key] = when
+                    raise
+                finally:
+                    with self._lock:
+                        self._in_flight = {}
+            
+            # Also picks up completions and quiz submissions logged since the
+            # last pass, so the watermark keeps up without any views, and
+            # brings the reporting rollups up to date and drops expired
+            # idempotency keys when those are due
+            with self.app.app_context():
+                compact_events()
+                if rollup_schedule.due():
+                    refresh_rollups()
+                if idempotency_prune_schedule.due():
+                    prune_idempotency_keys()
+            return len(batch)
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(self.flush_interval + 1)
+        # A process that never served a lesson has nothing to flush
+        if self.app is not None and (self._thread is not None or self._pending):
+            self.flush()
+
+    def _start(self):
+        """Start the flush thread if needed; False means flush inline instead"""
+        if not self.flush_interval:
+            return False
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='access-buffer', daemon=True)
+                    self._thread.start()
+        return True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Failed to flush lesson views')
+
+access_buffer = AccessTimeBuffer(
+    flush_interval=float(os.environ.get('ACCESS_FLUSH_INTERVAL', 5)),
+    max_pending=int(os.environ.get('ACCESS_FLUSH_MAX_PENDING', 1000))
+)
+access_buffer.init_app(app)
+
 @app.route('/')
 def index():
     if current_user.is_authenticated:
         return redirect(url_for('dashboard'))
     return render_template('index.html')
 
+@app.errorhandler(HashingOverloaded)
+def hashing_overloaded(error):
+    app.logger.warning('Rejected request: %s', error)
+    return 'The server is busy, please try again in a moment.', 503, {'Retry-After': '1'}
+
+@app.route('/metrics')
+def show_metrics():
+    return request_metrics.render(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
@@ -104,10 +1024,16 @@ def register():
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password)
+            password_hash=password_hasher.hash(password)
         )
-        db.session.add(user)
-        db.session.commit()
+        try:
+            commit_with_retry(lambda: db.session.add(user))
+        except IntegrityError:
+            # Someone registered the same name or email a moment ago
+            db.session.rollback()
+            flash('Username or email already exists')
+            return render_template('register.html')
+        sync_leaderboard(user)
         
         login_user(user)
         return redirect(url_for('dashboard'))
@@ -121,7 +1047,14 @@ def login():
         password = request.form['password']
         user = User.query.filter_by(username=username).first()
         
-        if user and check_password_hash(user.password_hash, password):
+        if user and password_hasher.verify(user.password_hash, password):
+            if password_hasher.needs_rehash(user.password_hash):
+                # The configured work factor changed since this hash was made
+                try:
+                    user.password_hash = password_hasher.hash(password)
+                    db.session.commit()
+                except HashingOverloaded:
+                    pass
             login_user(user)
             return redirect(url_for('dashboard'))
         else:
@@ -138,283 +1071,1223 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # Get user's progress
-    progress = Progress.query.filter_by(user_id=current_user.id).all()
-    completed_modules = [p.module_id for p in progress if p.completed]
-    
-    # Get current module
-    current_module = Module.query.filter_by(
-        level=current_user.current_level,
-        order_num=current_user.current_module
-    ).first()
-    
-    # Get achievements
-    user_achievements = UserAchievement.query.filter_by(user_id=current_user.id).all()
-    achievements = [Achievement.query.get(ua.achievement_id) for ua in user_achievements]
+    snapshot = dashboard_cache.get(current_user.id)
+    if snapshot is None:
+        snapshot = build_dashboard_snapshot(current_user)
+        dashboard_cache.put(current_user.id, snapshot)
     
     return render_template('dashboard.html', 
-                         current_module=current_module,
-                         completed_modules=completed_modules,
-                         achievements=achievements)
+                         next_module=snapshot.next_module,
+                         level_progress=snapshot.level_progress,
+                         completed_count=sum(level.completed for level in snapshot.level_progress),
+                         achievements=snapshot.achievements,
+                         levels=LEVELS,
+                         catalogue_page_size=CATALOGUE_PAGE_SIZE)
 
 @app.route('/learn/<int:module_id>')
 @login_required
 def learn(module_id):
-    module = Module.query.get_or_404(module_id)
+    bundle = module_bundles.get(module_id)
+    if bundle is None:
+        abort(404)
+    
+    # Logged as a module_viewed event on the next flush, which also touches Progress
+    access_buffer.record(current_user.id, module_id)
+    completed = db.session.query(Progress.completed).filter_by(
+        user_id=current_user.id, module_id=module_id
+    ).scalar()
+    
+    return render_template('learn.html', 
+                         module=bundle.module,
+                         fragments=render_lesson_fragments(bundle),
+                         completed=bool(completed))
+
+MODULE_COMPLETION_POINTS = 10
+
+# Idempotency keys
+# A retry only needs its stored answer for a short while, so keys older than
+# IDEMPOTENCY_KEY_SECONDS are deleted by the flush thread every hour (or by
+# flask prune-idempotency-keys). Retrying after that is still safe: the
+# completion is simply reported as already done.
+IDEMPOTENCY_KEY_SECONDS = float(os.environ.get('IDEMPOTENCY_KEY_SECONDS', 86400))
+idempotency_prune_schedule = Schedule(3600)
+
+def prune_idempotency_keys(batch_size=1000):
+    """Delete expired idempotency keys in batches; return how many were deleted"""
+    cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_KEY_SECONDS)
+    expired = select(IdempotencyKey.id).where(IdempotencyKey.created_at < cutoff).limit(batch_size)
+    total = 0
+    while True:
+        deleted = commit_with_retry(lambda: db.session.execute(
+            IdempotencyKey.__table__.delete().where(IdempotencyKey.id.in_(expired.scalar_subquery()))
+        ).rowcount)
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+@app.cli.command('prune-idempotency-keys')
+@click.option('--batch-size', default=1000, show_default=True, help='Keys deleted per transaction.')
+def prune_idempotency_keys_command(batch_size):
+    """Delete idempotency keys older than IDEMPOTENCY_KEY_SECONDS"""
+    print(f'Deleted {prune_idempotency_keys(batch_size)} idempotency keys')
+
+@app.route('/complete_module', methods=['POST'])
+@login_required
+def complete_module():
+    payload = request.get_json(silent=True) or {}
+    try:
+        module_id = int(payload.get('module_id'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'module_id must be an integer'}), 400
     
-    # Update last accessed
-    progress = Progress.query.filter_by(
-        user_id=current_user.id,
-        module_id=module_id
-    ).first()
+    idempotency_key = request.headers.get('Idempotency-Key') or payload.get('idempotency_key')
+    if idempotency_key:
+        idempotency_key = str(idempotency_key)[:64]
+        replay = IdempotencyKey.query.filter_by(user_id=current_user.id, key=idempotency_key).first()
+        if replay:
+            return jsonify(json.loads(replay.response))
     
-    if not progress:
-        progress = Progress(user_id=current_user.id, module_id=module_id)
-        db.session.add(progress)
+    user_id = current_user.id
+    if not has_opened_module(user_id, module_id):
+        return jsonify({'success': False})
     
-    progress.last_accessed = datetime.utcnow()
-    db.session.commit()
+    def complete():
+        append_events(db.session.connection(), [
+            {'user_id': user_id, 'module_id': module_id, 'kind': MODULE_COMPLETED}
+        ])
+        fold = fold_user_events(user_id)
+        first_time = (user_id, module_id) in fold.completed
+        response = {
+            'success': True,
+            'already_completed': not first_time,
+            'points_awarded': MODULE_COMPLETION_POINTS if first_time else 0,
+            'new_achievement_ids': fold.new_achievements.get(user_id, []),
+        }
+        if idempotency_key:
+            db.session.add(IdempotencyKey(user_id=user_id, key=idempotency_key,
+                                          response=json.dumps(response)))
+        return response, fold
     
-    # Get quiz questions
-    quiz_questions = Quiz.query.filter_by(module_id=module_id).all()
+    for attempt in range(2):
+        try:
+            response, fold = commit_with_retry(complete)
+            break
+        except IntegrityError:
+            # A concurrent request awarded a badge or used the key first; the
+            # retry sees its committed state
+            db.session.rollback()
+            if idempotency_key:
+                replay = IdempotencyKey.query.filter_by(user_id=user_id, key=idempotency_key).first()
+                if replay:
+                    return jsonify(json.loads(replay.response))
+            if attempt:
+                raise
     
-    # Get project
-    project = Project.query.filter_by(module_id=module_id).first()
+    publish_fold(fold)
+    return jsonify(response)
+
+# Leaderboard
+# Loaded from the user table on first use and kept current by the routes that
+# change points or level. Points awarded by other workers or by a separate
+# compact-events run never reach this copy, so it is also reloaded from the
+# table every LEADERBOARD_REFRESH_SECONDS by whichever request finds it due.
+leaderboard = Leaderboard()
+leaderboard_lock = threading.Lock()
+leaderboard_refresh = Schedule(float(os.environ.get('LEADERBOARD_REFRESH_SECONDS', 60)))
+
+def ensure_leaderboard_loaded():
+    due = leaderboard_refresh.due()
+    if due or not leaderboard.loaded:
+        with leaderboard_lock:
+            if due or not leaderboard.loaded:
+                leaderboard.rebuild(db.session.query(
+                    User.id, User.username, User.total_points, User.current_level
+                ))
+
+def sync_leaderboard(user):
+    """Copy a user's committed points and level into the leaderboard"""
+    if leaderboard.loaded:
+        leaderboard.update(user.id, user.username, user.total_points, user.current_level)
+
+@app.route('/leaderboard')
+@login_required
+def show_leaderboard():
+    level = request.args.get('level') or None
+    if level is not None and level not in LEVELS:
+        return jsonify({'success': False, 'error': f'Unknown level {level!r}'}), 400
+    limit = max(1, min(100, request.args.get('limit', 10, type=int)))
     
-    return render_template('learn.html', 
-                         module=module,
-                         quiz_questions=quiz_questions,
-                         project=project)
+    ensure_leaderboard_loaded()
+    return jsonify({
+        'success': True,
+        'level': level,
+        'top': leaderboard.top(limit, level),
+        'me': leaderboard.rank(current_user.id, level),
+    })
 
-@app.route('/complete_module', methods=['POST'])
+def search_args():
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(50, request.args.get('per_page', SEARCH_PER_PAGE, type=int)))
+    return query, page, per_page
+
+@app.route('/search')
 @login_required
-def complete_module():
-    module_id = request.json.get('module_id')
-    quiz_score = request.json.get('quiz_score', 0)
+def search():
+    query, page, per_page = search_args()
+    hits, total = search_modules(query, page, per_page)
+    return render_template('search.html', query=query, hits=hits, total=total,
+                           page=page, pages=-(-total // per_page))
+
+@app.route('/api/search')
+@login_required
+def search_api():
+    query, page, per_page = search_args()
+    hits, total = search_modules(query, page, per_page)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': -(-total // per_page),
+        'results': [hit._asdict() for hit in hits],
+    })
+
+# Module prerequisites
+# ModulePrerequisite edges over every module, checked for cycles, ordered and
+# closed into bitsets once per process (see prerequisites.py). Modules whose
+# prerequisites allow it keep curriculum order, so without edges the path is
+# the familiar level-by-level sequence. Bit masks of each level's modules
+# come along for the dashboard's progress counts.
+ModuleGraph = namedtuple('ModuleGraph', 'prerequisites level_masks')
+
+def curriculum_rank():
+    return case({level: rank for rank, level in enumerate(LEVELS)}, value=Module.level, else_=len(LEVELS))
+
+def load_module_graph():
+    modules = db.session.query(Module.id, Module.level).order_by(
+        curriculum_rank(), Module.order_num, Module.id
+    ).all()
+    known = {module_id for module_id, _ in modules}
+    requires = {}
+    for module_id, prerequisite_id in db.session.query(ModulePrerequisite.module_id,
+                                                       ModulePrerequisite.prerequisite_id):
+        # Edges left behind by a deleted module
+        if module_id in known and prerequisite_id in known:
+            requires.setdefault(module_id, []).append(prerequisite_id)
     
-    progress = Progress.query.filter_by(
-        user_id=current_user.id,
-        module_id=module_id
-    ).first()
+    graph = PrerequisiteGraph([module_id for module_id, _ in modules], requires)
+    level_masks = {
+        level: graph.mask(module_id for module_id, module_level in modules if module_level == level)
+        for level in LEVELS
+    }
+    return ModuleGraph(graph, level_masks)
+
+class ModuleGraphCache:
+    """Holds the process's ModuleGraph until the modules or their edges change"""
+
+    def __init__(self):
+        self._graph = None
+        self._generation = 0
+        self._lock = threading.Lock()
     
-    if progress:
-        progress.completed = True
-        progress.quiz_score = quiz_score
-        db.session.commit()
-        
-        # Award points
-        current_user.total_points += 10
-        db.session.commit()
-        
-        # Check for achievements
-        check_achievements(current_user.id)
+    def get(self, module_ids=()):
+        """The current graph, reloaded once if it lacks any of module_ids.
+
+        Other processes (say, a load-curriculum run) do not reset this one's
+        graph, so meeting an unknown module is the sign it is out of date.
+        """
+        graph = self._load()
+        if any(module_id not in graph.prerequisites.position for module_id in module_ids):
+            self.reset()
+            graph = self._load()
+        return graph
+    
+    def _load(self):
+        graph = self._graph
+        if graph is None:
+            generation = self._generation
+            graph = load_module_graph()
+            with self._lock:
+                # A reset while loading means what was read may be stale
+                if generation == self._generation:
+                    self._graph = graph
+        return graph
+    
+    def reset(self):
+        with self._lock:
+            self._generation += 1
+            self._graph = None
+
+module_graph = ModuleGraphCache()
+
+def completed_mask(graph, user_id):
+    """Bitset of the modules user_id has completed"""
+    return graph.prerequisites.mask(
+        module_id for (module_id,) in db.session.query(Progress.module_id).filter_by(
+            user_id=user_id, completed=True
+        )
+    )
+
+# Module catalogue
+# Keyset pages in curriculum order: levels by rank, then order_num, with the
+# id breaking ties. The cursor is the (level, order_num, id) of the last entry
+# sent, so a page is an ix_module_level_order range scan for each level it
+# spans, with the learner's progress outer-joined into the same query.
+CATALOGUE_PAGE_SIZE = int(os.environ.get('CATALOGUE_PAGE_SIZE', 20))
+CATALOGUE_MAX_PAGE_SIZE = 100
+
+CatalogueEntry = namedtuple('CatalogueEntry', 'id level title description order_num completed unlocked quiz_score')
+
+def catalogue_key(entry):
+    return (entry.level, entry.order_num, entry.id)
+
+def catalogue_query(user_id):
+    return db.session.query(
+        Module.id, Module.level, Module.title, Module.description, Module.order_num,
+        Progress.completed, Progress.quiz_score
+    ).outerjoin(Progress, and_(
+        Progress.module_id == Module.id,
+        Progress.user_id == user_id
+    ))
+
+def catalogue_entry(row, graph, completed):
+    return CatalogueEntry(row.id, row.level, row.title, row.description, row.order_num,
+                          bool(row.completed), graph.prerequisites.is_unlocked(row.id, completed), row.quiz_score)
+
+def catalogue_page(user_id, levels, after=None, limit=CATALOGUE_PAGE_SIZE):
+    """Return up to limit entries of levels after the cursor key, and the next cursor"""
+    if after is not None:
+        levels = levels[levels.index(after[0]):]
+    
+    rows = []
+    for level in levels:
+        query = catalogue_query(user_id).filter(Module.level == level)
+        if after is not None and after[0] == level:
+            query = query.filter(tuple_(Module.order_num, Module.id) > (after[1], after[2]))
         
-        return jsonify({'success': True})
-    
-    return jsonify({'success': False})
-
-def check_achievements(user_id):
-    user = User.query.get(user_id)
-    completed_modules = Progress.query.filter_by(user_id=user_id, completed=True).count()
-    
-    # First module completion
-    if completed_modules >= 1:
-        achievement = Achievement.query.filter_by(name='First Steps').first()
-        if achievement and not UserAchievement.query.filter_by(
-            user_id=user_id, achievement_id=achievement.id
-        ).first():
-            user_achievement = UserAchievement(user_id=user_id, achievement_id=achievement.id)
-            db.session.add(user_achievement)
-    
-    # Level completion achievements
-    if completed_modules >= 4:  # Beginner level
-        achievement = Achievement.query.filter_by(name='Beginner Master').first()
-        if achievement and not UserAchievement.query.filter_by(
-            user_id=user_id, achievement_id=achievement.id
-        ).first():
-            user_achievement = UserAchievement(user_id=user_id, achievement_id=achievement.id)
-            db.session.add(user_achievement)
-    
-    db.session.commit()
-
-def initialize_data():
-    """Initialize the database with sample data"""
-    
-    # Create modules
-    modules_data = [
-        {
-            'level': 'beginner',
-            'title': 'MLOps Fundamentals',
-            'description': 'Learn the basics of MLOps and why it matters',
-            'content': '''
-            <h3>What is MLOps?</h3>
-            <p>MLOps (Machine Learning Operations) is a set of practices that combines Machine Learning and DevOps to deploy and maintain ML systems in production reliably and efficiently.</p>
-            
-            <h3>Why MLOps Matters</h3>
-            <p>Traditional software development has established practices for deployment and monitoring, but ML systems have unique challenges:</p>
-            <ul>
-                <li>Data dependencies and drift</li>
-                <li>Model retraining needs</li>
-                <li>Complex model validation</li>
-                <li>Reproducibility challenges</li>
-            </ul>
-            
-            <h3>MLOps Lifecycle</h3>
-            <p>The MLOps lifecycle typically includes:</p>
-            <ol>
-                <li><strong>Data Management:</strong> Collection, validation, and preprocessing</li>
-                <li><strong>Model Development:</strong> Training, validation, and packaging</li>
-                <li><strong>Deployment:</strong> Model serving and infrastructure setup</li>
-                <li><strong>Monitoring:</strong> Performance tracking and alerting</li>
-                <li><strong>Retraining:</strong> Continuous model improvement</li>
-            </ol>
-            ''',
-            'summary': 'MLOps bridges the gap between ML research and production deployment, ensuring reliable, scalable, and maintainable ML systems.',
-            'external_resources': json.dumps([
-                {'title': 'MLOps: Continuous delivery and automation pipelines in ML', 'url': 'https://cloud.google.com/architecture/mlops-continuous-delivery-and-automation-pipelines-in-machine-learning', 'type': 'article'},
-                {'title': 'What is MLOps?', 'url': 'https://www.youtube.com/watch?v=9_BnHvm-5IY', 'type': 'video'},
-                {'title': 'MLOps Best Practices', 'url': 'https://ml-ops.org/', 'type': 'resource'}
-            ]),
-            'order_num': 1
-        },
-        {
-            'level': 'beginner',
-            'title': 'ML Pipeline Basics',
-            'description': 'Understand the fundamental components of ML pipelines',
-            'content': '''
-            <h3>ML Pipeline Components</h3>
-            <p>A typical ML pipeline consists of several interconnected stages:</p>
-            
-            <h4>1. Data Ingestion</h4>
-            <p>Raw data from various sources (databases, APIs, files) is collected and stored.</p>
-            
-            <h4>2. Data Preprocessing</h4>
-            <p>Data cleaning, transformation, and feature engineering to prepare data for training.</p>
-            
-            <h4>3. Model Training</h4>
-            <p>Using algorithms to learn patterns from the preprocessed data.</p>
-            
-            <h4>4. Model Validation</h4>
-            <p>Testing model performance on unseen data to ensure quality.</p>
-            
-            <h4>5. Model Deployment</h4>
-            <p>Making the trained model available for predictions in production.</p>
-            
-            <h4>6. Model Monitoring</h4>
-            <p>Tracking model performance and data quality over time.</p>
-            ''',
-            'summary': 'ML pipelines automate the end-to-end process from raw data to deployed models, ensuring consistency and reproducibility.',
-            'external_resources': json.dumps([
-                {'title': 'ML Pipeline Design Patterns', 'url': 'https://www.kubeflow.org/docs/pipelines/', 'type': 'documentation'},
-                {'title': 'Building ML Pipelines', 'url': 'https://www.youtube.com/watch?v=oF2Vh0LhJ0k', 'type': 'video'}
-            ]),
-            'order_num': 2
-        }
-    ]
+        # One row past the page tells whether another page follows
+        rows.extend(query.order_by(Module.order_num, Module.id).limit(limit + 1 - len(rows)))
+        if len(rows) > limit:
+            break
     
-    for module_data in modules_data:
-        module = Module(**module_data)
-        db.session.add(module)
+    graph = module_graph.get(row.id for row in rows)
+    completed = completed_mask(graph, user_id)
+    return split_page([catalogue_entry(row, graph, completed) for row in rows], limit, catalogue_key)
+
+def catalogue_args():
+    """Parse level, limit and cursor; raise ValueError on bad input"""
+    requested = {level for value in request.args.getlist('level') for level in value.split(',') if level}
+    unknown = requested - set(LEVELS)
+    if unknown:
+        raise ValueError(f'Unknown level: {", ".join(sorted(unknown))}')
+    levels = [level for level in LEVELS if not requested or level in requested]
     
-    # Create achievements
-    achievements_data = [
-        {
-            'name': 'First Steps',
-            'description': 'Completed your first MLOps module',
-            'badge_icon': '🎯',
-            'requirements': 'Complete 1 module'
-        },
-        {
-            'name': 'Beginner Master',
-            'description': 'Completed all beginner level modules',
-            'badge_icon': '🥉',
-            'requirements': 'Complete 4 beginner modules'
-        },
-        {
-            'name': 'Quiz Master',
-            'description': 'Achieved 100% on a quiz',
-            'badge_icon': '🧠',
-            'requirements': 'Score 100% on any quiz'
-        }
-    ]
+    limit = max(1, min(CATALOGUE_MAX_PAGE_SIZE, request.args.get('limit', CATALOGUE_PAGE_SIZE, type=int)))
     
-    for achievement_data in achievements_data:
-        achievement = Achievement(**achievement_data)
-        db.session.add(achievement)
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor, (str, int, int))
+        if after[0] not in levels:
+            raise ValueError('Cursor does not belong to the requested levels')
+    return levels, after, limit
+
+@app.route('/api/modules')
+@login_required
+def modules_api():
+    try:
+        levels, after, limit = catalogue_args()
+    except ValueError as exc:
+        return jsonify({'success': False, 'error': str(exc)}), 400
     
-    # Create sample quiz questions
-    quiz_questions = [
-        {
-            'module_id': 1,
-            'question': 'What does MLOps stand for?',
-            'options': json.dumps(['Machine Learning Operations', 'Machine Learning Optimization', 'Machine Learning Organization', 'Machine Learning Orchestration']),
-            'correct_answer': 0,
-            'explanation': 'MLOps stands for Machine Learning Operations, combining ML and DevOps practices.'
-        },
+    entries, next_cursor = catalogue_page(current_user.id, levels, after, limit)
+    return jsonify({
+        'success': True,
+        'levels': levels,
+        'modules': [entry._asdict() for entry in entries],
+        'next_cursor': next_cursor,
+    })
+
+@app.route('/api/modules/next')
+@login_required
+def next_modules_api():
+    """The unlocked modules to take next, earliest in the prerequisite order first"""
+    count = max(1, min(CATALOGUE_MAX_PAGE_SIZE, request.args.get('count', 3, type=int)))
+    graph = module_graph.get()
+    completed = completed_mask(graph, current_user.id)
+    recommended = graph.prerequisites.recommend(completed, count)
+    
+    rows = {}
+    if recommended:
+        rows = {row.id: row for row in catalogue_query(current_user.id).filter(Module.id.in_(recommended))}
+    return jsonify({
+        'success': True,
+        'unlocked': graph.prerequisites.unlocked(completed).bit_count(),
+        'modules': [catalogue_entry(rows[module_id], graph, completed)._asdict()
+                    for module_id in recommended if module_id in rows],
+    })
+
+# Instructor access
+# Reports and bulk grading are open only to the users listed in
+# INSTRUCTOR_USERNAMES; nobody can use them until it is set, and '*' opens
+# them to everyone signed in
+INSTRUCTORS = frozenset(
+    name.strip() for name in os.environ.get('INSTRUCTOR_USERNAMES', '').split(',') if name.strip()
+)
+
+def instructor_required(view):
+    @functools.wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if '*' not in INSTRUCTORS and current_user.username not in INSTRUCTORS:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+# Quiz grading
+NO_ANSWER = 255
+
+def normalize_answers(answer_key, answers):
+    """Turn a submission into bytes aligned with the answer key.
+
+    answers is either a list in question order or a {question_id: option}
+    mapping; unanswered or out-of-range choices become NO_ANSWER.
+    """
+    if isinstance(answers, dict):
+        answers = [answers.get(str(question_id), answers.get(question_id))
+                   for question_id in answer_key.question_ids]
+    elif not isinstance(answers, (list, tuple)):
+        raise ValueError('answers must be a list or an object')
+    
+    selected = bytearray([NO_ANSWER]) * len(answer_key.question_ids)
+    for position, choice in enumerate(answers[:len(selected)]):
+        if isinstance(choice, int) and not isinstance(choice, bool) and 0 <= choice < NO_ANSWER:
+            selected[position] = choice
+    return bytes(selected)
+
+def score_answers(answer_key, selected):
+    """Return (per-question correctness, score as a percentage)"""
+    correct = list(map(operator.eq, selected, answer_key.answers))
+    total = len(correct)
+    return correct, (round(100 * sum(correct) / total) if total else 0)
+
+def score_batch(answer_key, submissions):
+    """Score many submissions against one answer key; return percentages"""
+    total = len(answer_key.answers)
+    if not total:
+        return [0] * len(submissions)
+    key = answer_key.answers
+    return [round(100 * sum(map(operator.eq, normalize_answers(answer_key, answers), key)) / total)
+            for answers in submissions]
+
+def parse_quiz_request():
+    payload = request.get_json(silent=True) or {}
+    try:
+        module_id = int(payload.get('module_id'))
+    except (TypeError, ValueError):
+        abort(400)
+    bundle = module_bundles.get(module_id)
+    if bundle is None or not bundle.answer_key.question_ids:
+        abort(404)
+    return payload, bundle
+
+@app.route('/grade_quiz', methods=['POST'])
+@login_required
+def grade_quiz():
+    payload, bundle = parse_quiz_request()
+    answer_key = bundle.answer_key
+    try:
+        selected = normalize_answers(answer_key, payload.get('answers') or [])
+    except ValueError as exc:
+        return jsonify({'success': False, 'error': str(exc)}), 400
+    correct, score = score_answers(answer_key, selected)
+    
+    user_id, module_id = current_user.id, bundle.module.id
+    if not has_opened_module(user_id, module_id):
+        return jsonify({'success': False, 'error': 'Open the module before taking its quiz'}), 409
+    
+    def submit():
+        append_events(db.session.connection(), [
+            {'user_id': user_id, 'module_id': module_id, 'kind': QUIZ_SUBMITTED, 'score': score}
+        ])
+        fold = fold_user_events(user_id)
+        stored = db.session.query(Progress.quiz_score).filter_by(
+            user_id=user_id, module_id=module_id
+        ).scalar()
+        return stored, fold
+    
+    for attempt in range(2):
+        try:
+            stored_score, fold = commit_with_retry(submit)
+            break
+        except IntegrityError:
+            # A concurrent request awarded the same badge; the retry sees it
+            db.session.rollback()
+            if attempt:
+                raise
+    publish_fold(fold)
+    new_achievements = fold.new_achievements.get(user_id, [])
+    
+    results = [
         {
-            'module_id': 1,
-            'question': 'Which of the following is NOT a typical MLOps lifecycle stage?',
-            'options': json.dumps(['Data Management', 'Model Development', 'Software Testing', 'Model Monitoring']),
-            'correct_answer': 2,
-            'explanation': 'Software Testing is not a specific MLOps lifecycle stage, though testing is important throughout.'
+            'question_id': question_id,
+            'selected': None if choice == NO_ANSWER else choice,
+            'correct': is_correct,
+            'explanation': explanation,
         }
+        for question_id, choice, is_correct, explanation in zip(
+            answer_key.question_ids, selected, correct, answer_key.explanations
+        )
     ]
+    return jsonify({
+        'success': True,
+        'score': score,
+        'stored_score': stored_score,
+        'correct': sum(correct),
+        'total': len(correct),
+        'results': results,
+        'new_achievement_ids': new_achievements,
+    })
+
+@app.route('/grade_quiz_batch', methods=['POST'])
+@instructor_required
+def grade_quiz_batch():
+    """Re-score many submissions for one module without storing anything"""
+    payload, bundle = parse_quiz_request()
+    submissions = payload.get('submissions')
+    if not isinstance(submissions, list):
+        return jsonify({'success': False, 'error': 'submissions must be a list'}), 400
+    try:
+        scores = score_batch(bundle.answer_key, submissions)
+    except ValueError as exc:
+        return jsonify({'success': False, 'error': str(exc)}), 400
+    return jsonify({'success': True, 'scores': scores})
+
+# Achievement rules
+# Each rule awards the seeded Achievement with that name once the user's stat
+# reaches the threshold. Level thresholds are level names, compared by rank.
+LEVELS = ['beginner', 'intermediate', 'advanced', 'expert']
+
+AchievementRule = namedtuple('AchievementRule', 'name stat threshold')
+
+ACHIEVEMENT_RULES = [
+    AchievementRule('First Steps', 'completed_modules', 1),
+    AchievementRule('Beginner Master', 'completed_beginner', 4),
+    AchievementRule('Quiz Master', 'best_quiz_score', 100),
+]
+
+class AchievementEngine:
+    """Evaluates achievement rules against one row of per-user stats.
+
+    The name -> id catalog is cached, so the cost of a check is one stats
+    query, one lookup of already earned badges when any rule matches, and
+    one batched insert, however many rules there are.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._catalog = None
+        self._lock = threading.Lock()
+
+    def catalog(self):
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    catalog = dict(db.session.query(Achievement.name, Achievement.id))
+                    if not catalog:
+                        # Nothing seeded yet; don't cache the empty result
+                        return catalog
+                    self._catalog = catalog
+        return self._catalog
+
+    def reset(self):
+        self._catalog = None
+
+    def user_stats(self, user_id):
+        completed = case((Progress.completed == True, 1), else_=0)
+        columns = [
+            User.total_points,
+            User.current_level,
+            func.coalesce(func.sum(completed), 0),
+            func.coalesce(func.max(Progress.quiz_score), 0),
+        ]
+        for level in LEVELS:
+            columns.append(func.coalesce(func.sum(
+                case((and_(Progress.completed == True, Module.level == level), 1), else_=0)
+            ), 0))
+        
+        row = db.session.query(*columns).select_from(User).outerjoin(
+            Progress, Progress.user_id == User.id
+        ).outerjoin(
+            Module, Module.id == Progress.module_id
+        ).filter(User.id == user_id).group_by(User.id).first()
+        if row is None:
+            return None
+        
+        stats = {
+            'total_points': row[0] or 0,
+            'level': row[1] or LEVELS[0],
+            'completed_modules': row[2],
+            'best_quiz_score': row[3],
+        }
+        for level, count in zip(LEVELS, row[4:]):
+            stats['completed_' + level] = count
+        return stats
+
+    def satisfied(self, rule, stats):
+        value = stats.get(rule.stat, 0)
+        threshold = rule.threshold
+        if rule.stat == 'level':
+            value = LEVELS.index(value) if value in LEVELS else 0
+            threshold = LEVELS.index(threshold)
+        return value >= threshold
+
+    def award(self, user_id):
+        """Insert every newly earned achievement; return their ids"""
+        stats = self.user_stats(user_id)
+        if stats is None:
+            return []
+        
+        catalog = self.catalog()
+        earned = [catalog[rule.name] for rule in self.rules
+                  if rule.name in catalog and self.satisfied(rule, stats)]
+        if not earned:
+            return []
+        
+        held = {achievement_id for (achievement_id,) in db.session.query(
+            UserAchievement.achievement_id
+        ).filter(
+            UserAchievement.user_id == user_id,
+            UserAchievement.achievement_id.in_(earned)
+        )}
+        new_ids = [achievement_id for achievement_id in dict.fromkeys(earned)
+                   if achievement_id not in held]
+        if new_ids:
+            now = datetime.utcnow()
+            db.session.execute(insert(UserAchievement), [
+                {'user_id': user_id, 'achievement_id': achievement_id, 'earned_at': now}
+                for achievement_id in new_ids
+            ])
+        return new_ids
+
+achievement_engine = AchievementEngine(ACHIEVEMENT_RULES)
+
+# Reporting rollups
+# refresh_rollups() folds the events past the 'reports' watermark into the
+# *Rollup tables. Each batch is aggregated in memory and written with one
+# upsert per table, and the median time to complete is recomputed with a
+# window function only for modules that gained a completion. /reports reads
+# nothing but those tables, so instructors never scan the raw history.
+REPORTS_WATERMARK = 'reports'
+ROLLUP_MODELS = [LearnerModuleRollup, ModuleDailyRollup, ModuleRollup, QuizScoreRollup,
+                 ActiveLearnerRollup, DailyActivityRollup]
+rollup_schedule = Schedule(float(os.environ.get('REPORTS_REFRESH_SECONDS', 60)))
+
+def load_learner_modules(keys):
+    """The LearnerModuleRollup rows for (user_id, module_id) keys, as dicts"""
+    found = {}
+    table = LearnerModuleRollup.__table__
+    for chunk in chunked(keys, 500):
+        for row in db.session.execute(select(table).where(
+            tuple_(table.c.user_id, table.c.module_id).in_(chunk)
+        )).mappings():
+            found[(row['user_id'], row['module_id'])] = dict(row)
+    return found
+
+def refresh_completion_medians(module_ids):
+    conn = db.session.connection()
+    for chunk in chunked(sorted(module_ids), 500):
+        ranked = select(
+            LearnerModuleRollup.module_id,
+            LearnerModuleRollup.completion_seconds.label('seconds'),
+            func.row_number().over(partition_by=LearnerModuleRollup.module_id,
+                                   order_by=LearnerModuleRollup.completion_seconds).label('position'),
+            func.count().over(partition_by=LearnerModuleRollup.module_id).label('total'),
+        ).where(
+            LearnerModuleRollup.module_id.in_(chunk),
+            LearnerModuleRollup.completion_seconds != None
+        ).subquery()
+        # The middle row, or the two middle rows of an even count
+        middle = or_(ranked.c.position == (ranked.c.total + 1) // 2,
+                     ranked.c.position == (ranked.c.total + 2) // 2)
+        rows = db.session.execute(
+            select(ranked.c.module_id, func.max(ranked.c.total), func.avg(ranked.c.seconds))
+            .where(middle).group_by(ranked.c.module_id)
+        ).all()
+        upsert(conn, ModuleRollup.__table__, ('module_id',), [
+            {'module_id': module_id, 'completions': total, 'median_completion_seconds': float(median)}
+            for module_id, total, median in rows
+        ])
+
+def rollup_events(events):
+    """Fold a batch of events (joined with their module's level) into the rollups; the caller commits"""
+    activity = Counter()
+    learner_days = set()
+    scores = Counter()
+    reached = {}
+    for row in events:
+        day = row.created_at.date()
+        activity[day] += 1
+        learner_days.add((day, row.user_id))
+        stages = reached.setdefault((row.user_id, row.module_id), {'first_seen_at': row.created_at})
+        stages['first_seen_at'] = min(stages['first_seen_at'], row.created_at)
+        if row.kind == QUIZ_SUBMITTED:
+            stages.setdefault('first_quiz_at', row.created_at)
+            if row.score is not None and row.level is not None:
+                scores[(day, row.level, score_bucket(row.score))] += 1
+        elif row.kind == MODULE_COMPLETED:
+            stages.setdefault('completed_at', row.created_at)
+    
+    # Only a learner's first view, quiz attempt and completion of a module
+    # count towards its funnel
+    existing = load_learner_modules(list(reached))
+    inserts, updates = [], []
+    funnel = {}
+    finished_modules = set()
+    for (user_id, module_id), stages in reached.items():
+        old = existing.get((user_id, module_id))
+        row = old or {'user_id': user_id, 'module_id': module_id, 'first_seen_at': stages['first_seen_at'],
+                      'first_quiz_at': None, 'completed_at': None, 'completion_seconds': None}
+        new_stages = [] if old else [('opened', row['first_seen_at'])]
+        if 'first_quiz_at' in stages and row['first_quiz_at'] is None:
+            row['first_quiz_at'] = stages['first_quiz_at']
+            new_stages.append(('quizzed', row['first_quiz_at']))
+        if 'completed_at' in stages and row['completed_at'] is None:
+            row['completed_at'] = stages['completed_at']
+            row['completion_seconds'] = max(0, round(
+                (row['completed_at'] - row['first_seen_at']).total_seconds()
+            ))
+            new_stages.append(('completed', row['completed_at']))
+            finished_modules.add(module_id)
+        if not new_stages:
+            continue
+        (updates if old else inserts).append(row)
+        for stage, when in new_stages:
+            counts = funnel.setdefault((when.date(), module_id), {'opened': 0, 'quizzed': 0, 'completed': 0})
+            counts[stage] += 1
+    
+    conn = db.session.connection()
+    if inserts:
+        conn.execute(insert(LearnerModuleRollup), inserts)
+    if updates:
+        table = LearnerModuleRollup.__table__
+        conn.execute(table.update().where(
+            table.c.user_id == bindparam('b_user_id'), table.c.module_id == bindparam('b_module_id')
+        ).values(first_quiz_at=bindparam('first_quiz_at'), completed_at=bindparam('completed_at'),
+                 completion_seconds=bindparam('completion_seconds')),
+            [{'b_user_id': row['user_id'], 'b_module_id': row['module_id'], 'first_quiz_at': row['first_quiz_at'],
+              'completed_at': row['completed_at'], 'completion_seconds': row['completion_seconds']}
+             for row in updates])
+    upsert(conn, ModuleDailyRollup.__table__, ('day', 'module_id'), [
+        {'day': day, 'module_id': module_id, **counts} for (day, module_id), counts in funnel.items()
+    ], increment=('opened', 'quizzed', 'completed'))
+    upsert(conn, QuizScoreRollup.__table__, ('day', 'level', 'bucket'), [
+        {'day': day, 'level': level, 'bucket': bucket, 'attempts': attempts}
+        for (day, level, bucket), attempts in scores.items()
+    ], increment=('attempts',))
+    insert_missing(conn, ActiveLearnerRollup.__table__, ('day', 'user_id'), [
+        {'day': day, 'user_id': user_id} for day, user_id in learner_days
+    ])
+    upsert(conn, DailyActivityRollup.__table__, ('day',), [
+        {'day': day, 'events': count} for day, count in activity.items()
+    ], increment=('events',))
+    conn.execute(update(DailyActivityRollup).where(DailyActivityRollup.day.in_(list(activity))).values(
+        active_learners=select(func.count()).where(
+            ActiveLearnerRollup.day == DailyActivityRollup.day
+        ).scalar_subquery()
+    ))
+    if finished_modules:
+        refresh_completion_medians(finished_modules)
+
+def refresh_rollups(batch_size=5000, rebuild=False):
+    """Fold new events into the reporting rollups; return how many were read"""
+    if rebuild:
+        def clear():
+            for model in ROLLUP_MODELS:
+                db.session.query(model).delete()
+            write_watermark(REPORTS_WATERMARK, 0)
+        commit_with_retry(clear)
+    
+    def step():
+        events = db.session.execute(
+            events_after(REPORTS_WATERMARK, LearningEvent.id, LearningEvent.user_id, LearningEvent.module_id,
+                         LearningEvent.kind, LearningEvent.score, LearningEvent.created_at, Module.level)
+            .outerjoin(Module, Module.id == LearningEvent.module_id)
+            .limit(batch_size)
+        ).all()
+        if events:
+            rollup_events(events)
+            write_watermark(REPORTS_WATERMARK, events[-1].id)
+        return len(events)
     
-    for quiz_data in quiz_questions:
-        quiz = Quiz(**quiz_data)
-        db.session.add(quiz)
+    total = 0
+    while True:
+        count = commit_with_retry(step)
+        total += count
+        if count < batch_size:
+            return total
+
+@app.cli.command('refresh-reports')
+@click.option('--rebuild', is_flag=True, help='Empty the rollup tables and fold the whole log again.')
+@click.option('--batch-size', default=5000, show_default=True, help='Events folded per transaction.')
+def refresh_reports_command(rebuild, batch_size):
+    """Bring the reporting rollups up to date with the event log"""
+    print(f'Rolled up {refresh_rollups(batch_size, rebuild=rebuild)} events')
+
+# Instructor reports
+def report_filters():
+    """Parse ?since= and ?until= (inclusive ISO dates) and ?level="""
+    filters = {}
+    for name in ('since', 'until'):
+        value = request.args.get(name)
+        try:
+            filters[name] = date.fromisoformat(value) if value else None
+        except ValueError:
+            raise ValueError(f'{name} must be a date such as 2024-01-31')
+    level = request.args.get('level') or None
+    if level is not None and level not in LEVELS:
+        raise ValueError(f'Unknown level {level!r}')
+    filters['level'] = level
+    return filters
+
+def day_range(column, since, until):
+    conditions = []
+    if since is not None:
+        conditions.append(column >= since)
+    if until is not None:
+        conditions.append(column <= until)
+    return conditions
+
+def funnel_report(since, until, level):
+    daily = db.session.query(
+        ModuleDailyRollup.module_id,
+        func.sum(ModuleDailyRollup.opened).label('opened'),
+        func.sum(ModuleDailyRollup.quizzed).label('quizzed'),
+        func.sum(ModuleDailyRollup.completed).label('completed'),
+    ).filter(*day_range(ModuleDailyRollup.day, since, until)).group_by(ModuleDailyRollup.module_id).subquery()
+    query = db.session.query(
+        Module.id, Module.level, Module.title, daily.c.opened, daily.c.quizzed, daily.c.completed,
+        ModuleRollup.median_completion_seconds
+    ).outerjoin(daily, daily.c.module_id == Module.id).outerjoin(
+        ModuleRollup, ModuleRollup.module_id == Module.id
+    )
+    if level is not None:
+        query = query.filter(Module.level == level)
+    level_rank = case({name: rank for rank, name in enumerate(LEVELS)}, value=Module.level, else_=len(LEVELS))
     
-    # Create sample projects
-    projects_data = [
+    modules = []
+    for row in query.order_by(level_rank, Module.order_num, Module.id):
+        opened = row.opened or 0
+        modules.append({
+            'module_id': row.id,
+            'level': row.level,
+            'title': row.title,
+            'opened': opened,
+            'quizzed': row.quizzed or 0,
+            'completed': row.completed or 0,
+            'completion_rate': round((row.completed or 0) / opened, 4) if opened else None,
+            'median_completion_seconds': row.median_completion_seconds,
+        })
+    return {'modules': modules}
+
+def quiz_score_report(since, until, level):
+    query = db.session.query(
+        QuizScoreRollup.level, QuizScoreRollup.bucket, func.sum(QuizScoreRollup.attempts)
+    ).filter(*day_range(QuizScoreRollup.day, since, until)).group_by(QuizScoreRollup.level, QuizScoreRollup.bucket)
+    if level is not None:
+        query = query.filter(QuizScoreRollup.level == level)
+    
+    histograms = {}
+    for level_name, bucket, attempts in query:
+        histograms.setdefault(level_name, dict.fromkeys(SCORE_BUCKETS, 0))[bucket] = attempts
+    return {'levels': [
         {
-            'module_id': 1,
-            'title': 'Your First MLOps Project',
-            'description': 'Create a simple data pipeline using Python',
-            'starter_code': '''
-import pandas as pd
-import numpy as np
-
-# TODO: Load sample data
-# TODO: Perform basic data cleaning
-# TODO: Create a simple visualization
-
-print("Welcome to your first MLOps project!")
-            ''',
-            'solution': '''
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-
-# Load sample data
-data = {'feature1': [1, 2, 3, 4, 5], 'feature2': [2, 4, 6, 8, 10], 'target': [1, 0, 1, 0, 1]}
-df = pd.DataFrame(data)
-
-# Basic data cleaning
-print("Data shape:", df.shape)
-print("Missing values:", df.isnull().sum())
-
-# Create visualization
-plt.figure(figsize=(8, 6))
-plt.scatter(df['feature1'], df['feature2'], c=df['target'])
-plt.xlabel('Feature 1')
-plt.ylabel('Feature 2')
-plt.title('Sample Data Visualization')
-plt.show()
-
-print("MLOps pipeline step 1 completed!")
-            '''
+            'level': level_name,
+            'attempts': sum(histograms[level_name].values()),
+            'buckets': [{'range': bucket_label(bucket), 'attempts': attempts}
+                        for bucket, attempts in histograms[level_name].items()],
         }
-    ]
+        for level_name in LEVELS if level_name in histograms
+    ]}
+
+def active_learner_report(since, until, level):
+    rows = db.session.query(DailyActivityRollup).filter(
+        *day_range(DailyActivityRollup.day, since, until)
+    ).order_by(DailyActivityRollup.day)
+    return {'days': [
+        {'day': row.day.isoformat(), 'active_learners': row.active_learners, 'events': row.events}
+        for row in rows
+    ]}
+
+REPORTS = {
+    'funnel': funnel_report,
+    'quiz-scores': quiz_score_report,
+    'active-learners': active_learner_report,
+}
+
+def report_freshness():
+    """The last event folded into the rollups"""
+    last_event_id = read_watermark(REPORTS_WATERMARK)
+    last_event_at = db.session.query(LearningEvent.created_at).filter(
+        LearningEvent.id == last_event_id
+    ).scalar()
+    return {'last_event_id': last_event_id,
+            'last_event_at': last_event_at.isoformat() if last_event_at else None}
+
+@app.route('/reports')
+@instructor_required
+def list_reports():
+    return jsonify({'success': True, 'reports': sorted(REPORTS), 'as_of': report_freshness()})
+
+@app.route('/reports/<name>')
+@instructor_required
+def show_report(name):
+    build = REPORTS.get(name)
+    if build is None:
+        abort(404)
+    try:
+        filters = report_filters()
+    except ValueError as exc:
+        return jsonify({'success': False, 'error': str(exc)}), 400
+    
+    return jsonify({
+        'success': True,
+        'report': name,
+        'as_of': report_freshness(),
+        'since': filters['since'].isoformat() if filters['since'] else None,
+        'until': filters['until'].isoformat() if filters['until'] else None,
+        'level': filters['level'],
+        **build(**filters),
+    })
+
+# Schema upgrades
+# db.create_all() only creates missing tables, so indexes added to existing
+# tables are created here. Duplicate rows left behind by racing requests are
+# merged first, otherwise the unique indexes could not be built.
+DUPLICATE_MERGES = [
+    ('progress', ('user_id', 'module_id'),
+     ('completed', 'quiz_score', 'project_completed', 'last_accessed')),
+    ('user_achievement', ('user_id', 'achievement_id'), ()),
+]
+
+def merge_duplicate_rows(conn, table, key, merged_columns):
+    """Keep the oldest row per key, folding in the max of merged_columns"""
+    key_list = ', '.join(key)
+    has_duplicates = conn.execute(text(
+        f'SELECT 1 FROM {table} GROUP BY {key_list} HAVING COUNT(*) > 1 LIMIT 1'
+    )).first()
+    if not has_duplicates:
+        return 0
+    
+    if merged_columns:
+        match = ' AND '.join(f'd.{column} = {table}.{column}' for column in key)
+        assignments = ', '.join(
+            f'{column} = (SELECT MAX(d.{column}) FROM {table} d WHERE {match})'
+            for column in merged_columns
+        )
+        conn.execute(text(
+            f'UPDATE {table} SET {assignments} WHERE id IN '
+            f'(SELECT MIN(id) FROM {table} GROUP BY {key_list} HAVING COUNT(*) > 1)'
+        ))
+    result = conn.execute(text(
+        f'DELETE FROM {table} WHERE id NOT IN '
+        f'(SELECT MIN(id) FROM {table} GROUP BY {key_list})'
+    ))
+    return result.rowcount
+
+def upgrade_schema(engine=None):
+    """Bring an existing database up to the current indexes and search table; safe to re-run"""
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        for table, key, merged_columns in DUPLICATE_MERGES:
+            removed = merge_duplicate_rows(conn, table, key, merged_columns)
+            if removed:
+                print(f'Merged {removed} duplicate {table} rows')
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        build_module_search(conn)
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables and indexes in the configured database"""
+    db.create_all()
+    upgrade_schema()
+    print('Database schema is up to date')
+
+# Curriculum loading
+# Content lives in curriculum/ as files (see curriculum.py). Records are keyed
+# by a stable "key" (achievements by name) and CurriculumRecord remembers
+# which row each key went into and the hash of what was loaded, so
+# re-importing only touches records whose file content changed.
+CURRICULUM_DIR = os.environ.get(
+    'CURRICULUM_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'curriculum')
+)
+
+CurriculumKind = namedtuple('CurriculumKind', 'model key_field natural_key to_row')
+
+def curriculum_fields(location, record, required, optional=()):
+    missing = [field for field in required if record.get(field) in (None, '')]
+    if missing:
+        raise CurriculumError(f'{location}: missing {", ".join(missing)}')
+    return {field: record[field] for field in required + optional if field in record}
+
+def module_row(location, record, module_ids):
+    row = curriculum_fields(location, record,
+                            ('level', 'title', 'description', 'content', 'summary', 'order_num'),
+                            ('external_resources',))
+    if row['level'] not in LEVELS:
+        raise CurriculumError(f'{location}: unknown level {row["level"]!r}')
+    row['external_resources'] = json.dumps(row.get('external_resources') or [])
+    return row
+
+def achievement_row(location, record, module_ids):
+    return curriculum_fields(location, record, ('name', 'description', 'badge_icon', 'requirements'))
+
+def quiz_row(location, record, module_ids):
+    row = curriculum_fields(location, record, ('question', 'options', 'correct_answer'), ('explanation',))
+    if not isinstance(row['options'], list) or not 0 <= row['correct_answer'] < len(row['options']):
+        raise CurriculumError(f'{location}: correct_answer must index into the options list')
+    row['options'] = json.dumps(row['options'])
+    row['explanation'] = row.get('explanation') or ''
+    row['module_id'] = module_ids[record['module']]
+    return row
+
+def project_row(location, record, module_ids):
+    row = curriculum_fields(location, record, ('title', 'description'), ('starter_code', 'solution'))
+    row['module_id'] = module_ids[record['module']]
+    return row
+
+# In load order: quizzes and projects refer to modules by key.
+# natural_key adopts rows that were created before the curriculum was loaded
+# from files, instead of inserting duplicates of them.
+CURRICULUM_KINDS = {
+    'modules': CurriculumKind(Module, 'key', ('level', 'order_num'), module_row),
+    'achievements': CurriculumKind(Achievement, 'name', ('name',), achievement_row),
+    'quizzes': CurriculumKind(Quiz, 'key', ('module_id', 'question'), quiz_row),
+    'projects': CurriculumKind(Project, 'key', ('module_id', 'title'), project_row),
+}
+
+def curriculum_module_ids(chunk):
+    """Map the module keys referenced by a chunk of records to module ids"""
+    keys = {record.get('module') for _, record in chunk}
+    module_ids = {
+        key: row_id for key, row_id in db.session.query(CurriculumRecord.key, CurriculumRecord.row_id)
+        .filter(CurriculumRecord.kind == 'modules', CurriculumRecord.key.in_(keys))
+    }
+    for location, record in chunk:
+        if record.get('module') not in module_ids:
+            raise CurriculumError(f'{location}: unknown module {record.get("module")!r}')
+    return module_ids
+
+def adopt_existing_rows(kind, rows):
+    """Return {natural key: id} for rows already in the table"""
+    first_column = kind.natural_key[0]
+    columns = [getattr(kind.model, column) for column in kind.natural_key]
+    existing = db.session.query(kind.model.id, *columns).filter(
+        columns[0].in_({row[first_column] for row in rows})
+    )
+    return {tuple(found[1:]): found[0] for found in existing}
+
+def load_curriculum_chunk(name, kind, chunk):
+    """Upsert one chunk of records; returns (inserted, updated, unchanged)"""
+    hashed = {}
+    for location, record in chunk:
+        key = record.get(kind.key_field)
+        if key in (None, ''):
+            raise CurriculumError(f'{location}: missing {kind.key_field}')
+        hashed[str(key)] = (location, record, content_hash(record))
+    
+    known = {
+        found.key: found for found in CurriculumRecord.query.filter(
+            CurriculumRecord.kind == name, CurriculumRecord.key.in_(hashed)
+        )
+    }
+    changed = [key for key, (_, _, digest) in hashed.items()
+               if key not in known or known[key].content_hash != digest]
+    unchanged = len(hashed) - len(changed)
+    if not changed:
+        return 0, 0, unchanged
+    
+    module_ids = curriculum_module_ids([hashed[key][:2] for key in changed]) if kind.model in (Quiz, Project) else {}
+    rows = {key: kind.to_row(hashed[key][0], hashed[key][1], module_ids) for key in changed}
     
-    for project_data in projects_data:
-        project = Project(**project_data)
-        db.session.add(project)
+    new_keys = [key for key in changed if key not in known]
+    adopted = adopt_existing_rows(kind, [rows[key] for key in new_keys]) if new_keys else {}
+    updates, inserts, record_updates = [], [], []
+    for key in changed:
+        row = rows[key]
+        if key in known:
+            row['id'] = known[key].row_id
+            record_updates.append({'id': known[key].id, 'content_hash': hashed[key][2]})
+            updates.append(row)
+            continue
+        row_id = adopted.get(tuple(row[column] for column in kind.natural_key))
+        if row_id is not None:
+            row['id'] = row_id
+            updates.append(row)
+        else:
+            inserts.append(row)
+    
+    db.session.bulk_update_mappings(kind.model, updates)
+    db.session.bulk_insert_mappings(kind.model, inserts, return_defaults=True)
+    if kind.model is Module:
+        index_modules(db.session.connection(), [rows[key]['id'] for key in changed])
+    db.session.bulk_update_mappings(CurriculumRecord, record_updates)
+    db.session.bulk_insert_mappings(CurriculumRecord, [
+        {'kind': name, 'key': key, 'row_id': rows[key]['id'], 'content_hash': hashed[key][2]}
+        for key in new_keys
+    ])
+    return len(inserts), len(updates), unchanged
+
+# Content generation
+# Lesson bundles and fragments, the prerequisite graph and dashboard
+# snapshots are cached per process, but an import usually runs in another
+# one (flask load-curriculum). Every import bumps the 'curriculum'
+# CacheGeneration, and each process compares it with the value it last saw
+# at most every CONTENT_CHECK_SECONDS, dropping those caches when it moved.
+CURRICULUM_GENERATION = 'curriculum'
+
+def read_generation(name):
+    return db.session.query(CacheGeneration.value).filter_by(name=name).scalar() or 0
+
+def bump_generation(name):
+    """Increment a generation in the current transaction and return its new value"""
+    moved = db.session.execute(
+        update(CacheGeneration).where(CacheGeneration.name == name).values(
+            value=CacheGeneration.value + 1
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if not moved:
+        db.session.execute(insert(CacheGeneration).values(name=name, value=1))
+    return read_generation(name)
+
+class GenerationWatch:
+    """Calls on_change when a CacheGeneration moves, reading it at most every check_interval seconds"""
+
+    def __init__(self, name, on_change, check_interval):
+        self.name = name
+        self.on_change = on_change
+        self._schedule = Schedule(check_interval)
+        self._seen = None
+    
+    def check(self):
+        if not self._schedule.due():
+            return
+        value = read_generation(self.name)
+        if self._seen is not None and value != self._seen:
+            self.on_change()
+        self._seen = value
     
-    db.session.commit()
+    def seen(self, value):
+        """Record a bump made by this process, whose caches are already clear"""
+        self._seen = value
+
+def clear_content_caches():
+    """Drop everything cached from the curriculum"""
+    module_bundles.clear()
+    lesson_fragments.clear()
+    module_graph.reset()
+    dashboard_cache.clear()
+    achievement_engine.reset()
+
+content_generation = GenerationWatch(
+    CURRICULUM_GENERATION, clear_content_caches,
+    check_interval=float(os.environ.get('CONTENT_CHECK_SECONDS', 5))
+)
+
+@app.before_request
+def check_content_generation():
+    content_generation.check()
+
+def curriculum_prerequisites(directory):
+    """Read the "requires" lists of the modules under directory and check they form a DAG.
+
+    Runs before anything is loaded, so a cycle or an unknown key leaves the
+    database untouched. Returns {module key: [prerequisite keys]}.
+    """
+    requires = {}
+    for location, record in iter_records(directory, 'modules'):
+        needs = record.get('requires') or []
+        if not isinstance(needs, list) or not all(isinstance(need, str) for need in needs):
+            raise CurriculumError(f'{location}: requires must be a list of module keys')
+        requires[str(record.get('key'))] = needs
+    try:
+        PrerequisiteGraph(requires, requires)
+    except ValueError as exc:
+        raise CurriculumError(f'{directory}: {exc}') from exc
+    return requires
+
+def store_prerequisites(requires):
+    """Make the ModulePrerequisite edges of the given modules match requires"""
+    module_ids = dict(db.session.query(CurriculumRecord.key, CurriculumRecord.row_id).filter(
+        CurriculumRecord.kind == 'modules'
+    ))
+    loaded = {module_ids[key] for key in requires}
+    wanted = {(module_ids[key], module_ids[need]) for key, needs in requires.items() for need in needs}
+    existing = {
+        (module_id, prerequisite_id) for module_id, prerequisite_id in db.session.query(
+            ModulePrerequisite.module_id, ModulePrerequisite.prerequisite_id
+        ) if module_id in loaded
+    }
+    
+    stale = existing - wanted
+    for chunk in chunked(sorted(stale), 500):
+        db.session.query(ModulePrerequisite).filter(
+            tuple_(ModulePrerequisite.module_id, ModulePrerequisite.prerequisite_id).in_(chunk)
+        ).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(ModulePrerequisite, [
+        {'module_id': module_id, 'prerequisite_id': prerequisite_id}
+        for module_id, prerequisite_id in sorted(wanted - existing)
+    ])
+    return {'inserted': len(wanted - existing), 'deleted': len(stale), 'unchanged': len(wanted & existing)}
+
+def load_curriculum(directory=CURRICULUM_DIR, chunk_size=500):
+    """Stream every curriculum record under directory into the database.
+
+    Each chunk is one bulk transaction, and the module prerequisite edges are
+    replaced in one more. Returns {kind: {'inserted', 'updated',
+    'unchanged'}}, with 'deleted' instead of 'updated' for prerequisites.
+    """
+    requires = curriculum_prerequisites(directory)
+    results = {}
+    for name, kind in CURRICULUM_KINDS.items():
+        stats = results[name] = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        for chunk in chunked(iter_records(directory, name), chunk_size):
+            inserted, updated, unchanged = commit_with_retry(
+                lambda: load_curriculum_chunk(name, kind, chunk)
+            )
+            stats['inserted'] += inserted
+            stats['updated'] += updated
+            stats['unchanged'] += unchanged
+    results['prerequisites'] = commit_with_retry(lambda: store_prerequisites(requires))
+    
+    if any(stats['inserted'] or stats.get('updated') or stats.get('deleted') for stats in results.values()):
+        # Bulk statements bypass the session events that keep these current,
+        # and other processes only learn of the import from the generation
+        clear_content_caches()
+        content_generation.seen(commit_with_retry(lambda: bump_generation(CURRICULUM_GENERATION)))
+    return results
+
+@app.cli.command('load-curriculum')
+@click.argument('directory', default=CURRICULUM_DIR)
+@click.option('--chunk-size', default=500, show_default=True, help='Records per transaction')
+def load_curriculum_command(directory, chunk_size):
+    """Load modules, achievements, quizzes and projects from DIRECTORY"""
+    db.create_all()
+    upgrade_schema()
+    try:
+        results = load_curriculum(directory, chunk_size)
+    except CurriculumError as exc:
+        raise click.ClickException(str(exc))
+    for name, stats in results.items():
+        print(f'{name}: ' + ', '.join(f'{count} {outcome}' for outcome, count in stats.items()))
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-        if Module.query.count() == 0:
-            initialize_data()
+        upgrade_schema()
+        load_curriculum()
     app.run(debug=True)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Static assets for the MLOps Learning Platform
+Every file under static/ is content-hashed and gzipped once at startup, so
+pages link to names like style.3f9c2a71d0b4.css that browsers may cache
+forever: a changed file gets a new name. `python assets.py --out DIR` also
+writes the fingerprinted and .gz files to disk for a front-end server.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+from httpcache import accepts_gzip, etag_matches, gzip_etag
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset:
+    """One static file, ready to send"""
+
+    __slots__ = ('name', 'url_name', 'content_type', 'body', 'gzip_body', 'etag')
+
+    def __init__(self, name, url_name, content_type, body, gzip_body, etag):
+        self.name = name
+        self.url_name = url_name
+        self.content_type = content_type
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = etag
+
+    def response(self, immutable, if_none_match=None, accept_encoding=None):
+        """Return (status, headers, body) for a GET of this asset.
+
+        immutable is True when the fingerprinted name was requested; the
+        plain name is still served but must be revalidated.
+        """
+        body, etag = self.body, self.etag
+        gzipped = self.gzip_body is not None and accepts_gzip(accept_encoding)
+        if gzipped:
+            # Different bytes, so a different strong validator
+            body, etag = self.gzip_body, gzip_etag(self.etag)
+
+        headers = [('ETag', etag), ('Cache-Control', IMMUTABLE if immutable else REVALIDATE)]
+        if self.gzip_body is not None:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if etag_matches(if_none_match, etag):
+            return 304, headers, b''
+
+        if gzipped:
+            headers.append(('Content-Encoding', 'gzip'))
+        headers.append(('Content-Type', self.content_type))
+        headers.append(('Content-Length', str(len(body))))
+        return 200, headers, body
+
+
+def fingerprint(name, digest):
+    """style.css -> style.<digest>.css (directories are kept)"""
+    directory, base = os.path.split(name)
+    stem, dot, extension = base.rpartition('.')
+    fingerprinted = f'{stem}.{digest}.{extension}' if dot and stem else f'{base}.{digest}'
+    return f'{directory}/{fingerprinted}' if directory else fingerprinted
+
+
+class AssetManifest:
+    """Fingerprinted, pre-compressed copies of every file in a directory.
+
+    Names are '/'-separated paths relative to the directory, as used in
+    URLs. refresh() rebuilds only if a file was added, removed or changed.
+    """
+
+    def __init__(self, directory, min_gzip_size=256):
+        self.directory = directory
+        self.min_gzip_size = min_gzip_size
+        self._assets = {}
+        self._by_url_name = {}
+        self._signature = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        signature = self._scan()
+        if signature == self._signature:
+            return
+        assets = {}
+        for name, path, _, _ in signature:
+            assets[name] = self._build(name, path)
+        with self._lock:
+            self._assets = assets
+            self._by_url_name = {asset.url_name: asset for asset in assets.values()}
+            self._signature = signature
+
+    def url_name(self, name):
+        """Return the fingerprinted name for name, or name if it is unknown"""
+        asset = self._assets.get(name)
+        return asset.url_name if asset is not None else name
+
+    def lookup(self, requested):
+        """Return (asset, immutable) for a requested name, or (None, False)"""
+        asset = self._by_url_name.get(requested)
+        if asset is not None:
+            return asset, True
+        return self._assets.get(requested), False
+
+    def manifest(self):
+        return {name: asset.url_name for name, asset in sorted(self._assets.items())}
+
+    def write(self, out_dir):
+        """Write every fingerprinted file, its .gz variant and manifest.json"""
+        for asset in self._assets.values():
+            path = os.path.join(out_dir, *asset.url_name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as handle:
+                handle.write(asset.body)
+            if asset.gzip_body is not None:
+                with open(path + '.gz', 'wb') as handle:
+                    handle.write(asset.gzip_body)
+        with open(os.path.join(out_dir, 'manifest.json'), 'w') as handle:
+            json.dump(self.manifest(), handle, indent=2)
+
+    def _scan(self):
+        files = []
+        for root, directories, names in os.walk(self.directory):
+            directories[:] = sorted(d for d in directories if not d.startswith('.'))
+            for file_name in names:
+                if file_name.startswith('.') or file_name.endswith('.gz'):
+                    continue
+                path = os.path.join(root, file_name)
+                stat = os.stat(path)
+                name = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                files.append((name, path, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(files))
+
+    def _build(self, name, path):
+        with open(path, 'rb') as handle:
+            body = handle.read()
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+
+        gzip_body = None
+        if compressible and len(body) >= self.min_gzip_size:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                gzip_body = compressed
+        return Asset(name, fingerprint(name, digest), content_type, body, gzip_body, f'"{digest}"')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write fingerprinted, gzipped static assets')
+    parser.add_argument('--static', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    parser.add_argument('--out', default='build/static', help='output directory')
+    args = parser.parse_args()
+
+    manifest = AssetManifest(args.static)
+    manifest.write(args.out)
+    for name, url_name in manifest.manifest().items():
+        print(f'{name} -> {url_name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Query plans and lookup timings for the hot access paths, before and after
+the indexes created by app.upgrade_schema().
+
+    python benchmarks/index_plans.py --progress-rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+from app import LEVELS, db, upgrade_schema
+
+HOT_QUERIES = [
+    ('learn/complete_module: progress by (user, module)',
+     'SELECT * FROM progress WHERE user_id = :user_id AND module_id = :module_id'),
+    ('dashboard: completed modules for user',
+     'SELECT module_id FROM progress WHERE user_id = :user_id AND completed = 1'),
+    ('achievements: earned badge check',
+     'SELECT achievement_id FROM user_achievement WHERE user_id = :user_id AND achievement_id = :achievement_id'),
+    ('learn: quiz questions for module',
+     'SELECT * FROM quiz WHERE module_id = :module_id'),
+    ('learn: project for module',
+     'SELECT * FROM project WHERE module_id = :module_id'),
+    ('dashboard: current module by (level, order_num)',
+     'SELECT * FROM module WHERE level = :level AND order_num = :order_num'),
+]
+
+
+def create_legacy_schema(engine):
+    """Create the tables without any of the secondary indexes"""
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+
+
+def seed(engine, progress_rows, modules):
+    users = max(1, progress_rows // modules)
+    per_level = max(1, modules // len(LEVELS))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            'INSERT INTO module (id, level, title, description, content, summary, order_num) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(i, LEVELS[min((i - 1) // per_level, len(LEVELS) - 1)], f'Module {i}', '', '', '',
+              (i - 1) % per_level + 1) for i in range(1, modules + 1)]
+        )
+        conn.exec_driver_sql(
+            'INSERT INTO quiz (module_id, question, options, correct_answer, explanation) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(m, f'Q{q}', '[]', 0, '') for m in range(1, modules + 1) for q in range(5)]
+        )
+        conn.exec_driver_sql(
+            'INSERT INTO project (module_id, title, description) VALUES (?, ?, ?)',
+            [(m, f'Project {m}', '') for m in range(1, modules + 1)]
+        )
+        conn.exec_driver_sql(
+            'INSERT INTO achievement (id, name, description, badge_icon, requirements) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(a, f'Badge {a}', '', '', '') for a in range(1, 11)]
+        )
+        conn.exec_driver_sql(
+            'INSERT INTO user (id, username, email, password_hash, total_points) VALUES (?, ?, ?, ?, 0)',
+            [(u, f'user{u}', f'user{u}@example.com', '') for u in range(1, users + 1)]
+        )
+        
+        batch = []
+        for user_id in range(1, users + 1):
+            for module_id in range(1, modules + 1):
+                batch.append((user_id, module_id, module_id % 3 == 0, random.randint(0, 100)))
+            if len(batch) >= 100000:
+                conn.exec_driver_sql(
+                    'INSERT INTO progress (user_id, module_id, completed, quiz_score) VALUES (?, ?, ?, ?)',
+                    batch
+                )
+                batch = []
+        if batch:
+            conn.exec_driver_sql(
+                'INSERT INTO progress (user_id, module_id, completed, quiz_score) VALUES (?, ?, ?, ?)',
+                batch
+            )
+        
+        conn.exec_driver_sql(
+            'INSERT INTO user_achievement (user_id, achievement_id) VALUES (?, ?)',
+            [(u, a) for u in range(1, users + 1) for a in range(1, 4)]
+        )
+    return users, per_level
+
+
+def random_params(users, modules, per_level):
+    return {
+        'user_id': random.randint(1, users),
+        'module_id': random.randint(1, modules),
+        'achievement_id': random.randint(1, 10),
+        'level': random.choice(LEVELS),
+        'order_num': random.randint(1, per_level),
+    }
+
+
+def measure(engine, users, modules, per_level, lookups):
+    results = {}
+    with engine.connect() as conn:
+        conn.execute(text('ANALYZE'))
+        for label, sql in HOT_QUERIES:
+            params = random_params(users, modules, per_level)
+            plan = [row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql), params)]
+            
+            started = time.perf_counter()
+            for _ in range(lookups):
+                conn.execute(text(sql), random_params(users, modules, per_level)).fetchall()
+            elapsed = time.perf_counter() - started
+            results[label] = (plan, elapsed / lookups * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--progress-rows', type=int, default=1000000)
+    parser.add_argument('--modules', type=int, default=50)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        create_legacy_schema(engine)
+        
+        started = time.perf_counter()
+        users, per_level = seed(engine, args.progress_rows, args.modules)
+        print(f'Seeded {users * args.modules:,} progress rows for {users:,} users '
+              f'in {time.perf_counter() - started:.1f}s')
+        
+        before = measure(engine, users, args.modules, per_level, args.lookups)
+        
+        started = time.perf_counter()
+        upgrade_schema(engine)
+        print(f'upgrade_schema() built indexes in {time.perf_counter() - started:.1f}s\n')
+        
+        after = measure(engine, users, args.modules, per_level, args.lookups)
+        engine.dispose()
+    
+    for label, _ in HOT_QUERIES:
+        plan_before, ms_before = before[label]
+        plan_after, ms_after = after[label]
+        print(label)
+        print(f'  before: {ms_before:9.3f} ms/lookup  {"; ".join(plan_before)}')
+        print(f'  after:  {ms_after:9.3f} ms/lookup  {"; ".join(plan_after)}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Load test for the MLOps Learning Platform (standard library only)
+
+Starts app.py (Flask) or simple_app.py on a free local port with a throwaway
+database, registers N learners, then has them browse the dashboard, open
+lessons and complete modules concurrently. Prints requests/second and
+p50/p95/p99 latency per route as JSON, so runs can be compared across
+commits.
+
+    python benchmarks/load_test.py --target flask --users 50 --modules 20 --duration 20
+    python benchmarks/load_test.py --target simple-async --users 200 --output results.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = ('flask', 'simple', 'simple-async')
+
+SEED_FLASK = '''
+import sys
+from app import LEVELS, Module, Quiz, app, db, json, load_curriculum, upgrade_schema
+
+modules = int(sys.argv[1])
+with app.app_context():
+    db.create_all()
+    upgrade_schema()
+    load_curriculum()
+    for number in range(Module.query.count() + 1, modules + 1):
+        module = Module(
+            level=LEVELS[(number - 1) * len(LEVELS) // modules],
+            title=f'Benchmark module {number}',
+            description='Generated by benchmarks/load_test.py',
+            content='<p>Benchmark lesson content.</p>' * 100,
+            summary='Benchmark summary',
+            external_resources=json.dumps([]),
+            order_num=number
+        )
+        db.session.add(module)
+        db.session.flush()
+        for question in range(3):
+            db.session.add(Quiz(module_id=module.id, question=f'Question {question}?',
+                                options=json.dumps(['A', 'B', 'C', 'D']), correct_answer=question,
+                                explanation='Generated'))
+    db.session.commit()
+'''
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(target, port, modules, workdir, fast_hash):
+    env = dict(os.environ, PORT=str(port), PYTHONUNBUFFERED='1', ACCESS_LOG='0')
+    log = open(os.path.join(workdir, 'server.log'), 'wb')
+
+    if target == 'flask':
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        if fast_hash:
+            env['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+        subprocess.run([sys.executable, '-c', SEED_FLASK, str(modules)], cwd=REPO_ROOT,
+                       env=env, check=True, stdout=log, stderr=log)
+        command = [sys.executable, '-c',
+                   f'from app import app; app.run(host="127.0.0.1", port={port}, threaded=True)']
+    else:
+        env['DATA_DIR'] = os.path.join(workdir, 'data')
+        if fast_hash:
+            env['PASSWORD_ITERATIONS'] = '1000'
+        command = [sys.executable, 'simple_app.py']
+        if target == 'simple-async':
+            command.append('--async')
+
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=log, stderr=log)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{target} server exited early, see {log.name}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{target} server did not start within 30s')
+
+
+class Recorder:
+    """Collects latencies and errors per route label"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+class Learner:
+    """One simulated user with a persistent connection and cookie jar"""
+
+    def __init__(self, port, number, recorder):
+        self.port = port
+        self.username = f'learner{number}'
+        self.password = 'benchmark-password'
+        self.recorder = recorder
+        self.cookies = {}
+        self.connection = None
+
+    def request(self, route, method, path, body=None, content_type=None):
+        headers = {'Accept-Encoding': 'gzip'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        started = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                self.connection.close()
+                self.connection = None
+        except (OSError, http.client.HTTPException):
+            self.recorder.record(route, time.perf_counter() - started, False)
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            return None, b''
+
+        self.recorder.record(route, time.perf_counter() - started, response.status < 400)
+        for header, value in response.getheaders():
+            if header.lower() == 'set-cookie':
+                name, _, rest = value.partition('=')
+                self.cookies[name.strip()] = rest.split(';', 1)[0]
+        return response.status, data
+
+    def post_form(self, route, path, fields):
+        return self.request(route, 'POST', path, urllib.parse.urlencode(fields),
+                            'application/x-www-form-urlencoded')
+
+    def register(self):
+        self.post_form('POST /register', '/register', {
+            'username': self.username, 'email': f'{self.username}@example.com', 'password': self.password
+        })
+
+    def login(self):
+        self.cookies.clear()
+        self.post_form('POST /login', '/login', {'username': self.username, 'password': self.password})
+
+
+def run_scenario(target, port, users, concurrency, modules, duration, seed):
+    recorder = Recorder()
+    random.seed(seed)
+    learners = [Learner(port, number, recorder) for number in range(users)]
+    workers = max(1, min(concurrency, users))
+    groups = [learners[index::workers] for index in range(workers)]
+    module_ids = list(range(1, (2 if target != 'flask' else modules) + 1))
+
+    def setup(group):
+        for learner in group:
+            learner.register()
+            learner.login()
+
+    def browse(group, stop_at):
+        rng = random.Random(seed + id(group))
+        while time.perf_counter() < stop_at:
+            for learner in group:
+                module_id = rng.choice(module_ids)
+                learner.request('GET /dashboard', 'GET', '/dashboard')
+                learner.request('GET /learn/<id>', 'GET', f'/learn/{module_id}')
+                if target == 'flask' and rng.random() < 0.3:
+                    learner.request('POST /complete_module', 'POST', '/complete_module',
+                                    json.dumps({'module_id': module_id}), 'application/json')
+
+    def run_phase(func, *args):
+        threads = [threading.Thread(target=func, args=(group,) + args) for group in groups]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    setup_seconds = run_phase(setup)
+    setup_routes = set(recorder.latencies)
+    browse_seconds = run_phase(browse, time.perf_counter() + duration)
+    return recorder, setup_routes, setup_seconds, browse_seconds
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, setup_routes, setup_seconds, browse_seconds):
+    routes = {}
+    total = 0
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        elapsed = setup_seconds if route in setup_routes else browse_seconds
+        total += len(latencies)
+        routes[route] = {
+            'requests': len(latencies),
+            'errors': recorder.errors.get(route, 0),
+            'req_per_s': round(len(latencies) / elapsed, 1) if elapsed else None,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+        }
+    return total, routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test app.py or simple_app.py')
+    parser.add_argument('--target', choices=TARGETS, default='flask')
+    parser.add_argument('--users', type=int, default=50, help='learners to register')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='client threads (default: one per learner, max 200)')
+    parser.add_argument('--modules', type=int, default=20, help='modules to seed (Flask only)')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of browsing')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--fast-hash', action='store_true',
+                        help='use a cheap password hash so setup does not dominate')
+    parser.add_argument('--output', help='write the JSON report here as well as stdout')
+    args = parser.parse_args()
+    concurrency = args.concurrency or min(args.users, 200)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = start_server(args.target, port, args.modules, workdir, args.fast_hash)
+        try:
+            recorder, setup_routes, setup_seconds, browse_seconds = run_scenario(
+                args.target, port, args.users, concurrency, args.modules, args.duration, args.seed
+            )
+        finally:
+            server.terminate()
+            server.wait(10)
+
+    total, routes = summarize(recorder, setup_routes, setup_seconds, browse_seconds)
+    report = {
+        'target': args.target,
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'users': args.users,
+        'concurrency': concurrency,
+        'modules': args.modules if args.target == 'flask' else 2,
+        'setup_seconds': round(setup_seconds, 2),
+        'duration_seconds': round(browse_seconds, 2),
+        'total_requests': total,
+        'browse_req_per_s': round(sum(
+            stats['requests'] for route, stats in routes.items() if route not in setup_routes
+        ) / browse_seconds, 1) if browse_seconds else None,
+        'routes': routes,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Curriculum files for the MLOps Learning Platform
+A curriculum directory has one subdirectory per record kind (modules,
+achievements, quizzes, projects) holding .jsonl files, one JSON object per
+line, or .yaml/.yml files when PyYAML is installed. Records are streamed, so
+a directory can hold thousands of modules without loading them all at once.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+
+RECORD_KINDS = ('modules', 'achievements', 'quizzes', 'projects')
+JSON_SUFFIXES = ('.jsonl',)
+YAML_SUFFIXES = ('.yaml', '.yml')
+
+
+class CurriculumError(Exception):
+    """A curriculum file could not be read or a record is invalid"""
+
+
+def curriculum_files(root, kind):
+    directory = os.path.join(root, kind)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(JSON_SUFFIXES + YAML_SUFFIXES)
+    )
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield f'{path}:{line_number}', json.loads(line)
+            except ValueError as exc:
+                raise CurriculumError(f'{path}:{line_number}: {exc}') from exc
+
+
+def read_yaml(path):
+    """Yield records from every document in a YAML file.
+
+    A document is either one record or a list of records.
+    """
+    try:
+        import yaml
+    except ImportError:
+        raise CurriculumError(f'{path}: install PyYAML to load YAML curriculum files') from None
+
+    with open(path, encoding='utf-8') as handle:
+        try:
+            for document_number, document in enumerate(yaml.safe_load_all(handle), 1):
+                records = document if isinstance(document, list) else [document]
+                for index, record in enumerate(records, 1):
+                    if record is not None:
+                        yield f'{path}#{document_number}.{index}', record
+        except yaml.YAMLError as exc:
+            raise CurriculumError(f'{path}: {exc}') from exc
+
+
+def iter_records(root, kind):
+    """Yield (location, record) for every record of kind under root"""
+    for path in curriculum_files(root, kind):
+        reader = read_yaml if path.endswith(YAML_SUFFIXES) else read_jsonl
+        for location, record in reader(path):
+            if not isinstance(record, dict):
+                raise CurriculumError(f'{location}: expected an object, got {type(record).__name__}')
+            yield location, record
+
+
+def content_hash(record):
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
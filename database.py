@@ -0,0 +1,97 @@
+"""
+Database configuration for the MLOps Learning Platform
+The connection URL and pool come from the environment. SQLite connections
+are tuned for a web workload (WAL, relaxed fsync, memory-mapped reads and a
+busy timeout), and writes that still lose a lock race can be retried.
+"""
+
+import os
+import random
+import sqlite3
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+DEFAULT_DATABASE_URL = 'sqlite:///mlops_learning.db'
+
+
+def database_url():
+    url = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    # Heroku and Render still hand out the pre-SQLAlchemy-1.4 scheme
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def is_memory_sqlite(url):
+    return url.startswith('sqlite') and (':memory:' in url or url in ('sqlite://', 'sqlite:///'))
+
+
+def engine_options(url):
+    if is_memory_sqlite(url):
+        # In-memory databases use a single shared connection, not a pool
+        return {}
+
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    }
+    if not url.startswith('sqlite'):
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    return options
+
+
+def configure_database(app):
+    """Set the SQLAlchemy URL and engine options; call before SQLAlchemy(app)"""
+    url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+
+
+def sqlite_pragmas():
+    return [
+        ('journal_mode', os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        ('cache_size', int(os.environ.get('SQLITE_CACHE_SIZE', -65536))),
+        ('mmap_size', int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma, value in sqlite_pragmas():
+        cursor.execute(f'PRAGMA {pragma} = {value}')
+    cursor.close()
+
+
+def is_lock_error(exc):
+    message = str(getattr(exc, 'orig', exc)).lower()
+    return ('database is locked' in message or 'database is busy' in message
+            or 'deadlock detected' in message)
+
+
+def retry_on_lock(work, rollback=None, attempts=5, base_delay=0.02, max_delay=0.5):
+    """Call work(), retrying with jittered exponential backoff on lock errors.
+
+    work must be safe to repeat: it should run (and commit) a whole
+    transaction. rollback is called before each retry.
+    """
+    for attempt in range(attempts):
+        try:
+            return work()
+        except OperationalError as exc:
+            if attempt == attempts - 1 or not is_lock_error(exc):
+                raise
+            if rollback is not None:
+                rollback()
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            time.sleep(delay * (0.5 + random.random()))
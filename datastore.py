@@ -0,0 +1,304 @@
+"""
+Durable key-value storage for the MLOps Learning Platform (simple_app.py)
+Tables look like dicts. With the journal backend every write is appended to
+a journal file before the dict changes, and the whole store is periodically
+written to a snapshot so that startup only reads the latest snapshot plus
+the journal written since. A write cut short by a crash is detected by its
+checksum and dropped on the next start.
+
+Keys must be strings and values JSON-serializable, and only assignment and
+deletion are recorded: to change a stored dict, assign an updated copy.
+"""
+
+import json
+import os
+import re
+import threading
+import zlib
+from collections.abc import MutableMapping
+
+_SNAPSHOT = re.compile(r'^snapshot-(\d{8})\.json$')
+_JOURNAL = re.compile(r'^journal-(\d{8})\.log$')
+
+
+def _fsync_directory(directory):
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def encode_record(record):
+    payload = json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return b'%08x %s\n' % (zlib.crc32(payload), payload)
+
+
+def decode_record(line):
+    """Return the record on a journal line, or None if the line is damaged"""
+    if len(line) < 10 or not line.endswith(b'\n') or line[8:9] != b' ':
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+class Table(MutableMapping):
+    """A dict whose assignments and deletions are journaled by its store"""
+
+    def __init__(self, store, name, data):
+        self._store = store
+        self._name = name
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __setitem__(self, key, value):
+        self._store.write(self._name, key, value)
+
+    def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self._store.delete(self._name, key)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f'<Table {self._name!r} with {len(self._data)} keys>'
+
+
+class MemoryStore:
+    """Plain dicts; nothing survives a restart"""
+
+    def __init__(self):
+        self._tables = {}
+
+    def table(self, name):
+        return self._tables.setdefault(name, {})
+
+    def snapshot(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JournalStore:
+    """Tables persisted as snapshot-<generation>.json plus journal-<generation>.log.
+
+    A snapshot of generation G holds every write made before journal G was
+    started. A snapshot is taken after snapshot_every journaled writes (on a
+    background thread) and at close(). Once it is safely on disk, the older
+    snapshot and journals are deleted. With fsync=False writes reach the
+    operating system but not necessarily the disk, so they survive a
+    process crash but not a power cut.
+
+    The fsync happens outside the table lock, with group commit: a writer
+    waits until some fsync covers its line, and one fsync covers every line
+    written before it started, so concurrent writers share the disk flush
+    instead of queueing for one each.
+    """
+
+    def __init__(self, directory, snapshot_every=10000, fsync=True):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._tables = {}
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        # Taken before _lock whenever both are needed
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._journal = None
+        self._generation = 0
+        self._since_snapshot = 0
+        self._snapshotting = False
+        os.makedirs(directory, exist_ok=True)
+        self.recovered = self._recover()
+
+    def table(self, name):
+        with self._lock:
+            data = self._tables.setdefault(name, {})
+            return Table(self, name, data)
+
+    def write(self, table, key, value):
+        self._append([table, key, value])
+
+    def delete(self, table, key):
+        self._append([table, key])
+
+    def _append(self, record):
+        line = encode_record(record)
+        with self._lock:
+            # Journal first; the change and the journal line must land on
+            # the same side of a snapshot, so both happen under the lock
+            self._journal.write(line)
+            self._journal.flush()
+            self._apply(record)
+            self._written += 1
+            ticket = self._written
+            self._since_snapshot += 1
+            start = (self.snapshot_every and self._since_snapshot >= self.snapshot_every
+                     and not self._snapshotting)
+            if start:
+                self._snapshotting = True
+        if self.fsync:
+            self._sync(ticket)
+        if start:
+            threading.Thread(target=self.snapshot, name='store-snapshot', daemon=True).start()
+
+    def _sync(self, ticket):
+        """Return once journal write number ticket is on disk"""
+        with self._sync_lock:
+            if self._synced >= ticket:
+                # Flushed by the fsync another writer just finished
+                return
+            with self._lock:
+                target = self._written
+                fd = self._journal.fileno()
+            os.fsync(fd)
+            self._synced = target
+
+    def _apply(self, record):
+        table = self._tables.setdefault(record[0], {})
+        if len(record) == 3:
+            table[record[1]] = record[2]
+        else:
+            table.pop(record[1], None)
+
+    def snapshot(self):
+        """Write every table to a new snapshot and drop the files it replaces"""
+        with self._snapshot_lock:
+            try:
+                with self._sync_lock, self._lock:
+                    # Values are replaced, never changed in place, so copying
+                    # the dicts is enough for a consistent view
+                    tables = {name: dict(data) for name, data in self._tables.items()}
+                    generation = self._generation + 1
+                    self._open_journal(generation)
+                    self._since_snapshot = 0
+                self._write_snapshot(generation, tables)
+                self._remove_before(generation)
+            finally:
+                self._snapshotting = False
+
+    def close(self):
+        if self._journal is None:
+            return
+        if self._since_snapshot:
+            self.snapshot()
+        with self._sync_lock, self._lock:
+            self._journal.close()
+            self._journal = None
+
+    def _path(self, kind, generation):
+        return os.path.join(self.directory, f'{kind}-{generation:08d}.{"json" if kind == "snapshot" else "log"}')
+
+    def _generations(self, pattern):
+        found = []
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def _open_journal(self, generation):
+        if self._journal is not None:
+            if self.fsync:
+                # Writers still waiting on the old journal are covered here
+                os.fsync(self._journal.fileno())
+                self._synced = self._written
+            self._journal.close()
+        self._journal = open(self._path('journal', generation), 'ab')
+        self._generation = generation
+
+    def _write_snapshot(self, generation, tables):
+        path = self._path('snapshot', generation)
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as handle:
+            handle.write(json.dumps({'generation': generation, 'tables': tables},
+                                    separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+        _fsync_directory(self.directory)
+
+    def _remove_before(self, generation):
+        for pattern, kind in ((_SNAPSHOT, 'snapshot'), (_JOURNAL, 'journal')):
+            for older in self._generations(pattern):
+                if older < generation:
+                    os.remove(self._path(kind, older))
+
+    def _recover(self):
+        """Load the newest snapshot and replay the journals written after it; return how many writes were replayed"""
+        for name in os.listdir(self.directory):
+            if name.endswith('.tmp'):
+                # A snapshot that was never renamed into place
+                os.remove(os.path.join(self.directory, name))
+
+        generation = 0
+        snapshots = self._generations(_SNAPSHOT)
+        if snapshots:
+            generation = snapshots[-1]
+            with open(self._path('snapshot', generation), 'rb') as handle:
+                self._tables = json.load(handle)['tables']
+
+        replayed = 0
+        journals = [older for older in self._generations(_JOURNAL) if older >= generation]
+        for journal in journals:
+            replayed += self._replay(self._path('journal', journal))
+        self._open_journal(max(journals + [generation]))
+        self._since_snapshot = replayed
+        return replayed
+
+    def _replay(self, path):
+        replayed = 0
+        good_until = 0
+        with open(path, 'rb') as handle:
+            for line in handle:
+                record = decode_record(line)
+                if record is None:
+                    break
+                self._apply(record)
+                good_until += len(line)
+                replayed += 1
+        if good_until < os.path.getsize(path):
+            # The tail was torn by a crash mid-write; later writes must not
+            # follow it, so cut it off
+            with open(path, 'r+b') as handle:
+                handle.truncate(good_until)
+                handle.flush()
+                os.fsync(handle.fileno())
+        return replayed
+
+
+def open_store(default_directory):
+    """Build the store configured by STORE_BACKEND, DATA_DIR, STORE_SNAPSHOT_EVERY and STORE_FSYNC"""
+    backend = os.environ.get('STORE_BACKEND', 'journal')
+    if backend == 'memory':
+        return MemoryStore()
+    if backend != 'journal':
+        raise ValueError(f'Unknown STORE_BACKEND {backend!r}')
+    return JournalStore(
+        os.environ.get('DATA_DIR') or default_directory,
+        snapshot_every=int(os.environ.get('STORE_SNAPSHOT_EVERY', 10000)),
+        fsync=os.environ.get('STORE_FSYNC', '1') != '0'
+    )
@@ -0,0 +1,195 @@
+"""
+HTTP caching helpers for the MLOps Learning Platform
+Conditional request and content-coding checks shared by both servers, and a
+WSGI middleware that applies them to the Flask app's rendered pages.
+"""
+
+import hashlib
+import zlib
+
+# Set this WSGI environ key to a true value to send a response untouched
+SKIP_COMPRESSION = 'mlops.skip_compression'
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+# Representation headers that a 304 must not carry
+NOT_MODIFIED_DROPPED = {'content-length', 'content-type', 'content-encoding'}
+
+
+def etag_matches(if_none_match, etag):
+    """Return True if an If-None-Match header value matches etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def gzip_etag(etag):
+    """The strong ETag of the gzipped bytes of a body whose ETag is etag"""
+    return etag[:-1] + '-gz"'
+
+
+def accepts_gzip(accept_encoding):
+    """Return True if an Accept-Encoding header value allows gzip"""
+    if not accept_encoding:
+        return False
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _header(headers, name):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _without(headers, *names):
+    names = {name.lower() for name in names}
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+def _add_vary(headers):
+    vary = _header(headers, 'Vary')
+    if vary is None:
+        return headers + [('Vary', 'Accept-Encoding')]
+    if 'accept-encoding' in vary.lower() or vary.strip() == '*':
+        return headers
+    return _without(headers, 'Vary') + [('Vary', f'{vary}, Accept-Encoding')]
+
+
+class CompressionMiddleware:
+    """Gzip, weak ETags and 304 Not Modified for a WSGI app's 200 responses.
+
+    Bodies up to max_buffer bytes are buffered: they get a weak ETag (unless
+    the app set one), a 304 when it matches If-None-Match, and gzip when the
+    client accepts it and the body is at least min_size bytes. Larger or
+    streamed bodies are gzipped chunk by chunk as the app yields them, with
+    no ETag. Responses that already have a Content-Encoding, are not text,
+    or whose environ has SKIP_COMPRESSION set pass through untouched.
+    """
+
+    def __init__(self, app, min_size=500, compresslevel=6, max_buffer=1024 * 1024):
+        self.app = app
+        self.min_size = min_size
+        self.compresslevel = compresslevel
+        self.max_buffer = max_buffer
+
+    def __call__(self, environ, start_response):
+        captured = []
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            if exc_info and captured:
+                raise exc_info[1].with_traceback(exc_info[2])
+            captured[:] = [status, headers]
+            return written.append
+
+        app_iter = self.app(environ, capture)
+        iterator = iter(app_iter)
+        chunks = written
+        size = sum(len(chunk) for chunk in chunks)
+        complete = False
+        while size <= self.max_buffer:
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                complete = True
+                break
+            if chunk:
+                chunks.append(chunk)
+                size += len(chunk)
+
+        status, headers = captured
+        if not self._eligible(environ, status, headers):
+            start_response(status, headers)
+            return self._passthrough(chunks, iterator, app_iter)
+
+        gzip_ok = accepts_gzip(environ.get('HTTP_ACCEPT_ENCODING'))
+        headers = _add_vary(headers)
+        if not complete:
+            if gzip_ok:
+                headers = _without(headers, 'Content-Length') + [('Content-Encoding', 'gzip')]
+                start_response(status, headers)
+                return self._stream(chunks, iterator, app_iter)
+            start_response(status, headers)
+            return self._passthrough(chunks, iterator, app_iter)
+
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+        body = b''.join(chunks)
+        etag = _header(headers, 'ETag')
+        if etag is None:
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+            headers = headers + [('ETag', 'W/' + etag)]
+        elif etag.startswith('W/'):
+            etag = etag[2:]
+        if etag_matches(environ.get('HTTP_IF_NONE_MATCH'), etag):
+            start_response('304 Not Modified', [
+                (key, value) for key, value in headers if key.lower() not in NOT_MODIFIED_DROPPED
+            ])
+            return []
+
+        if gzip_ok and len(body) >= self.min_size:
+            body = self._compress_all(body)
+            headers = _without(headers, 'Content-Length') + [
+                ('Content-Encoding', 'gzip'), ('Content-Length', str(len(body)))
+            ]
+        start_response(status, headers)
+        return [body]
+
+    def _eligible(self, environ, status, headers):
+        if environ.get(SKIP_COMPRESSION) or environ.get('REQUEST_METHOD') != 'GET':
+            return False
+        if not status.startswith('200') or _header(headers, 'Content-Encoding'):
+            return False
+        content_type = (_header(headers, 'Content-Type') or '').lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compressor(self):
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        return zlib.compressobj(self.compresslevel, zlib.DEFLATED, 31)
+
+    def _compress_all(self, body):
+        compressor = self._compressor()
+        return compressor.compress(body) + compressor.flush()
+
+    def _stream(self, chunks, iterator, app_iter):
+        compressor = self._compressor()
+        try:
+            for chunk in chunks:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            for chunk in iterator:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def _passthrough(self, chunks, iterator, app_iter):
+        try:
+            yield from chunks
+            yield from iterator
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
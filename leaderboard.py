@@ -0,0 +1,253 @@
+"""
+In-memory leaderboard for the MLOps Learning Platform
+Users are ranked by points in an indexable skiplist, so updates, "my rank"
+and top-K reads are O(log n) instead of an ORDER BY over the user table.
+"""
+
+import math
+import random
+import threading
+
+
+class _End:
+    """Sentinel that sorts after every value"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+    def __ge__(self, other):
+        return True
+
+
+_END = _End()
+
+
+class _Node:
+    __slots__ = ('value', 'next', 'width')
+
+    def __init__(self, value, next, width):
+        self.value = value
+        self.next = next
+        self.width = width
+
+
+class IndexableSkiplist:
+    """Sorted collection with O(log n) insert, remove, indexing and rank.
+
+    Every forward link also stores how many elements it skips, which is what
+    makes positional lookups logarithmic.
+    """
+
+    def __init__(self, max_levels=24):
+        self.max_levels = max_levels
+        self.size = 0
+        self._tail = _Node(_END, [], [])
+        self._head = _Node(None, [self._tail] * max_levels, [1] * max_levels)
+
+    @classmethod
+    def from_sorted(cls, values, max_levels=24):
+        """Build a skiplist from already sorted values in O(n)"""
+        skiplist = cls(max_levels)
+        last = [skiplist._head] * max_levels
+        last_position = [0] * max_levels
+        position = 0
+        for value in values:
+            position += 1
+            height = skiplist._random_height()
+            node = _Node(value, [None] * height, [None] * height)
+            for level in range(height):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(max_levels):
+            last[level].next[level] = skiplist._tail
+            last[level].width[level] = position + 1 - last_position[level]
+        skiplist.size = position
+        return skiplist
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not self._tail:
+            yield node.value
+            node = node.next[0]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('skiplist index out of range')
+
+        node = self._head
+        position = index + 1
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= position:
+                position -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def bisect_left(self, value):
+        """Return the number of elements smaller than value"""
+        node = self._head
+        index = 0
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value < value:
+                index += node.width[level]
+                node = node.next[level]
+        return index
+
+    def insert(self, value):
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = self._random_height()
+        new_node = _Node(value, [None] * height, [None] * height)
+        steps = 0
+        for level in range(height):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, self.max_levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def _random_height(self):
+        return min(self.max_levels, 1 - int(math.log(1.0 - random.random(), 2.0)))
+
+    def remove(self, value):
+        chain = [None] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self._tail or target.value != value:
+            raise KeyError(value)
+
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.max_levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class Leaderboard:
+    """Global and per-level rankings by points.
+
+    Entries are keyed (-points, user_id), so ties are listed oldest account
+    first while sharing the same (competition-style) rank.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._users = {}
+        self._global = IndexableSkiplist()
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, rows):
+        """Replace every entry from (user_id, username, points, level) rows"""
+        users = {}
+        keys_by_level = {}
+        for user_id, username, points, level in rows:
+            points = points or 0
+            users[user_id] = (username, points, level)
+            keys_by_level.setdefault(level, []).append((-points, user_id))
+
+        all_keys = sorted(key for keys in keys_by_level.values() for key in keys)
+        levels = {level: IndexableSkiplist.from_sorted(sorted(keys))
+                  for level, keys in keys_by_level.items()}
+        with self._lock:
+            self._users = users
+            self._global = IndexableSkiplist.from_sorted(all_keys)
+            self._levels = levels
+            self.loaded = True
+
+    def update(self, user_id, username, points, level):
+        with self._lock:
+            self._discard(user_id)
+            self._add(user_id, username, points or 0, level)
+
+    def remove(self, user_id):
+        with self._lock:
+            self._discard(user_id)
+
+    def rank(self, user_id, level=None):
+        """Return {'rank', 'points', ...} for the user, or None if unranked"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or (level is not None and entry[2] != level):
+                return None
+            ranking = self._global if level is None else self._levels[level]
+            username, points, user_level = entry
+            return {
+                'rank': ranking.bisect_left((-points, 0)) + 1,
+                'user_id': user_id,
+                'username': username,
+                'points': points,
+                'level': user_level,
+                'of': len(ranking),
+            }
+
+    def top(self, limit=10, level=None):
+        with self._lock:
+            ranking = self._global if level is None else self._levels.get(level)
+            if ranking is None:
+                return []
+
+            results = []
+            rank = 0
+            previous_points = None
+            for position, (negative_points, user_id) in enumerate(ranking):
+                if position >= limit:
+                    break
+                points = -negative_points
+                if points != previous_points:
+                    rank = position + 1
+                    previous_points = points
+                username, _, user_level = self._users[user_id]
+                results.append({
+                    'rank': rank,
+                    'user_id': user_id,
+                    'username': username,
+                    'points': points,
+                    'level': user_level,
+                })
+            return results
+
+    def _add(self, user_id, username, points, level):
+        key = (-points, user_id)
+        self._users[user_id] = (username, points, level)
+        self._global.insert(key)
+        self._levels.setdefault(level, IndexableSkiplist()).insert(key)
+
+    def _discard(self, user_id):
+        entry = self._users.pop(user_id, None)
+        if entry is None:
+            return
+        _, points, level = entry
+        key = (-points, user_id)
+        self._global.remove(key)
+        self._levels[level].remove(key)
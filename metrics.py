@@ -0,0 +1,226 @@
+"""
+Request metrics for the MLOps Learning Platform
+Per-route latency histograms, response status counts and per-request
+database query counts, exposed in the Prometheus text format. Requests that
+are slow or run too many queries are logged together with their statements.
+Standard library only, so simple_app.py can use it too.
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+slow_log = logging.getLogger('mlops.slow_requests')
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestTrace:
+    """What one request did: its status and the queries it ran"""
+
+    __slots__ = ('started', 'status', 'queries', 'db_seconds', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status = 500
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestMetrics:
+    """Aggregates request traces per (method, route).
+
+    Call start() when a request begins and finish() when its response is
+    sent, on the same thread; record_query() in between attributes database
+    work to that request. Queries run outside a request (background flushes)
+    only count towards the process-wide totals.
+    """
+
+    def __init__(self, slow_seconds=0.5, slow_queries=50, max_statements=100):
+        self.slow_seconds = slow_seconds
+        self.slow_queries = slow_queries
+        self.max_statements = max_statements
+        self._latency = {}
+        self._query_counts = {}
+        self._db_seconds = {}
+        self._responses = {}
+        self._total_queries = 0
+        self._total_db_seconds = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self):
+        trace = RequestTrace()
+        self._local.trace = trace
+        return trace
+
+    def current(self):
+        return getattr(self._local, 'trace', None)
+
+    def record_query(self, statement, seconds):
+        trace = self.current()
+        if trace is not None:
+            trace.queries += 1
+            trace.db_seconds += seconds
+            if len(trace.statements) < self.max_statements:
+                trace.statements.append((seconds, statement))
+        with self._lock:
+            self._total_queries += 1
+            self._total_db_seconds += seconds
+
+    def finish(self, method, route, status=None):
+        trace = self.current()
+        if trace is None:
+            return
+        self._local.trace = None
+        seconds = time.perf_counter() - trace.started
+        status = trace.status if status is None else status
+        key = (method, route)
+
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._query_counts[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self._db_seconds[key] = 0.0
+            histogram.observe(seconds)
+            self._query_counts[key].observe(trace.queries)
+            self._db_seconds[key] += trace.db_seconds
+            status_key = (method, route, status)
+            self._responses[status_key] = self._responses.get(status_key, 0) + 1
+
+        if seconds >= self.slow_seconds or trace.queries >= self.slow_queries:
+            self._log_slow(method, route, status, seconds, trace)
+
+    def _log_slow(self, method, route, status, seconds, trace):
+        slowest = sorted(trace.statements, key=lambda item: item[0], reverse=True)[:10]
+        lines = [f'  {query_seconds * 1000:8.2f} ms  {" ".join(statement.split())}'
+                 for query_seconds, statement in slowest]
+        slow_log.warning('%s %s -> %s took %.1f ms with %d queries (%.1f ms in the database)%s',
+                         method, route, status, seconds * 1000, trace.queries,
+                         trace.db_seconds * 1000, ''.join('\n' + line for line in lines))
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        with self._lock:
+            latency = {key: (list(h.cumulative()), h.sum, h.count) for key, h in self._latency.items()}
+            query_counts = {key: (list(h.cumulative()), h.sum, h.count)
+                            for key, h in self._query_counts.items()}
+            db_seconds = dict(self._db_seconds)
+            responses = dict(self._responses)
+            total_queries = self._total_queries
+            total_db_seconds = self._total_db_seconds
+
+        lines = []
+
+        def histogram(name, help_text, values):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (method, route), (buckets, total, count) in sorted(values.items()):
+                labels = _labels(method=method, route=route)
+                for bound, cumulative in buckets:
+                    lines.append(f'{name}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {_number(total)}')
+                lines.append(f'{name}_count{{{labels}}} {count}')
+
+        histogram('mlops_http_request_duration_seconds', 'Request latency by route', latency)
+
+        lines.append('# HELP mlops_http_responses_total Responses by route and status code')
+        lines.append('# TYPE mlops_http_responses_total counter')
+        for (method, route, status), count in sorted(responses.items()):
+            lines.append(f'mlops_http_responses_total{{{_labels(method=method, route=route, status=status)}}} {count}')
+
+        histogram('mlops_request_db_queries', 'Database queries per request by route', query_counts)
+
+        lines.append('# HELP mlops_request_db_seconds_total Time spent in the database by route')
+        lines.append('# TYPE mlops_request_db_seconds_total counter')
+        for (method, route), total in sorted(db_seconds.items()):
+            lines.append(f'mlops_request_db_seconds_total{{{_labels(method=method, route=route)}}} {_number(total)}')
+
+        lines.append('# HELP mlops_db_queries_total Database queries, including background work')
+        lines.append('# TYPE mlops_db_queries_total counter')
+        lines.append(f'mlops_db_queries_total {total_queries}')
+        lines.append('# HELP mlops_db_seconds_total Time spent in the database, including background work')
+        lines.append('# TYPE mlops_db_seconds_total counter')
+        lines.append(f'mlops_db_seconds_total {_number(total_db_seconds)}')
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_engine(engine, metrics):
+    """Time every cursor execute on engine (an Engine or the Engine class)"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        metrics.record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_failed_query(context):
+        connection = context.connection
+        if connection is not None and connection.info.get('query_started'):
+            connection.info['query_started'].pop()
+
+
+def instrument_flask(app, metrics):
+    """Trace every Flask request, labelled by its URL rule"""
+    from flask import request
+
+    @app.before_request
+    def start_request_trace():
+        metrics.start()
+
+    @app.after_request
+    def record_response_status(response):
+        trace = metrics.current()
+        if trace is not None:
+            trace.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_trace(exc):
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        metrics.finish(request.method, route)
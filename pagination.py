@@ -0,0 +1,37 @@
+"""
+Keyset pagination helpers for the MLOps Learning Platform
+A page is requested with the sort key of the last row already shown rather
+than an offset, so the database seeks straight to it through an index and
+deep pages cost the same as the first. The key travels to the client as an
+opaque cursor.
+"""
+
+import base64
+import json
+
+
+def encode_cursor(key):
+    """Turn a sort key (a tuple of JSON values) into a URL-safe cursor"""
+    payload = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor, types):
+    """Return the sort key in cursor, checked against types; raise ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError('Malformed cursor') from None
+    if (not isinstance(key, list) or len(key) != len(types)
+            or not all(type(value) is kind for value, kind in zip(key, types))):
+        raise ValueError('Malformed cursor')
+    return tuple(key)
+
+
+def split_page(rows, limit, key):
+    """Cut rows fetched with limit + 1 into (page, next cursor or None)"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
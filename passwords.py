@@ -0,0 +1,91 @@
+"""
+Password hashing for the MLOps Learning Platform
+Hashing is deliberately slow, so it runs in a small process pool instead of
+on the request thread, and callers are turned away once too many hashes are
+already waiting rather than letting every route's latency grow.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing pool cannot take more work right now"""
+
+
+class PasswordHasher:
+    """Bounded process pool for generate/check_password_hash.
+
+    method is a Werkzeug hash method string and sets the work factor, e.g.
+    'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'. Hashes made with any other
+    method still verify, and needs_rehash() reports them so they can be
+    upgraded on the next successful login. workers=0 hashes inline.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=2, max_pending=32, timeout=10.0):
+        self.method = method
+        # Werkzeug expands shorthands such as 'scrypt' to the full parameter
+        # string it stores, so compare against a real hash's prefix
+        self.hash_prefix = generate_password_hash('', method).split('$', 1)[0]
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.hash_prefix
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingOverloaded(f'{self._pending} password hashes already queued')
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            executor = self._executor
+
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._release()
+            self.shutdown()
+            raise HashingOverloaded('password hashing pool restarted')
+        except BaseException:
+            self._release()
+            raise
+
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashingOverloaded('password hashing timed out')
+        except BrokenProcessPool:
+            self.shutdown()
+            raise HashingOverloaded('password hashing pool restarted')
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
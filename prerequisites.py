@@ -0,0 +1,134 @@
+"""
+Prerequisite graphs for the MLOps Learning Platform
+Modules form a DAG of "must be completed before" edges. The graph is checked
+for cycles and put in topological order once, when it is built, and the
+transitive prerequisites of every module are stored as an int bitset, so
+questions about a learner reduce to bitwise operations on the set of modules
+they have completed.
+"""
+
+import heapq
+
+
+class CycleError(ValueError):
+    """The prerequisites loop back on themselves"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__('Prerequisite cycle: ' + ' -> '.join(map(str, cycle)))
+
+
+class PrerequisiteGraph:
+    """Nodes in topological order with their prerequisites as bitsets.
+
+    Bit i of a mask stands for order[i]. Among nodes whose prerequisites
+    allow either order, the order they were given in is kept, so a graph
+    without edges is ordered exactly like its nodes.
+    """
+
+    def __init__(self, nodes, prerequisites=None):
+        """nodes is an iterable of hashable ids; prerequisites maps a node to the nodes it requires"""
+        nodes = list(nodes)
+        given = {node: index for index, node in enumerate(nodes)}
+        if len(given) != len(nodes):
+            raise ValueError('Nodes must be unique')
+
+        requires = {node: set() for node in nodes}
+        for node, needs in (prerequisites or {}).items():
+            if node not in given:
+                raise ValueError(f'Unknown module {node!r}')
+            for need in needs:
+                if need not in given:
+                    raise ValueError(f'{node!r} requires unknown module {need!r}')
+                requires[node].add(need)
+
+        self.order = self._topological_order(nodes, given, requires)
+        self.position = {node: position for position, node in enumerate(self.order)}
+        self.all = (1 << len(self.order)) - 1
+
+        # Filled in topological order, so each prerequisite's set is final
+        # by the time a module that requires it is reached
+        self.ancestors = []
+        for node in self.order:
+            ancestors = self.mask(requires[node])
+            for need in requires[node]:
+                ancestors |= self.ancestors[self.position[need]]
+            self.ancestors.append(ancestors)
+
+    @staticmethod
+    def _topological_order(nodes, given, requires):
+        waiting = {node: len(needs) for node, needs in requires.items()}
+        dependents = {node: [] for node in nodes}
+        for node, needs in requires.items():
+            for need in needs:
+                dependents[need].append(node)
+
+        # Kahn's algorithm, taking the earliest given node that is ready
+        ready = [given[node] for node in nodes if not waiting[node]]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            node = nodes[heapq.heappop(ready)]
+            order.append(node)
+            for dependent in dependents[node]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    heapq.heappush(ready, given[dependent])
+
+        if len(order) < len(nodes):
+            raise CycleError(PrerequisiteGraph._find_cycle(requires, waiting))
+        return order
+
+    @staticmethod
+    def _find_cycle(requires, waiting):
+        # Every node left waiting still requires another waiting node, so
+        # following those requirements must eventually revisit a node
+        node = next(node for node, count in waiting.items() if count)
+        path, seen = [], {}
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = next(need for need in requires[node] if waiting[need])
+        cycle = path[seen[node]:]
+        # Report it in "is required by" order: A -> B means B requires A
+        cycle.reverse()
+        return cycle + [cycle[0]]
+
+    def __len__(self):
+        return len(self.order)
+
+    def mask(self, nodes):
+        """Bitset of nodes; nodes outside the graph are ignored"""
+        mask = 0
+        for node in nodes:
+            position = self.position.get(node)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+    def nodes(self, mask, limit=None):
+        """The nodes in mask in topological order, stopping after limit if given"""
+        found = []
+        while mask and (limit is None or len(found) < limit):
+            lowest = mask & -mask
+            found.append(self.order[lowest.bit_length() - 1])
+            mask ^= lowest
+        return found
+
+    def unlocked(self, completed):
+        """Mask of the nodes not in completed whose prerequisites, direct or not, all are"""
+        missing = self.all & ~completed
+        unlocked = 0
+        for position, ancestors in enumerate(self.ancestors):
+            if not ancestors & missing:
+                unlocked |= 1 << position
+        return unlocked & missing
+
+    def is_unlocked(self, node, completed):
+        """Whether every prerequisite of node is in completed; a node outside the graph has none"""
+        position = self.position.get(node)
+        return position is None or not self.ancestors[position] & ~completed
+
+    def recommend(self, completed, count=1):
+        """Up to count unlocked nodes, earliest in topological order first"""
+        return self.nodes(self.unlocked(completed), limit=count)
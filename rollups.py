@@ -0,0 +1,97 @@
+"""
+Rollup helpers for the MLOps Learning Platform
+Reporting tables are kept as running aggregates: each refresh folds only the
+events recorded since the last one into per-day counters with one batched
+upsert per table, so reports never scan the raw history.
+"""
+
+import threading
+import time
+
+from sqlalchemy import and_, select
+
+SCORE_BUCKET_WIDTH = 10
+
+
+def score_bucket(score):
+    """Lower bound of a score's histogram bucket; 100 gets a bucket of its own"""
+    score = max(0, min(100, int(score)))
+    return 100 if score == 100 else score - score % SCORE_BUCKET_WIDTH
+
+
+def bucket_label(bucket):
+    return '100' if bucket == 100 else f'{bucket}-{bucket + SCORE_BUCKET_WIDTH - 1}'
+
+
+SCORE_BUCKETS = list(range(0, 100, SCORE_BUCKET_WIDTH)) + [100]
+
+
+def _dialect_insert(conn):
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def upsert(conn, table, key_columns, rows, increment=()):
+    """Insert rows, or update the row with the same key.
+
+    Columns named in increment are added to the stored value; every other
+    non-key column is overwritten.
+    """
+    if not rows:
+        return
+    value_columns = [column for column in rows[0] if column not in key_columns]
+    dialect_insert = _dialect_insert(conn)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: table.c[column] + stmt.excluded[column] if column in increment
+                  else stmt.excluded[column] for column in value_columns}
+        )
+        conn.execute(stmt, rows)
+        return
+
+    for row in rows:
+        match = and_(*(table.c[column] == row[column] for column in key_columns))
+        values = {column: table.c[column] + row[column] if column in increment else row[column]
+                  for column in value_columns}
+        if conn.execute(table.update().where(match).values(**values)).rowcount == 0:
+            conn.execute(table.insert().values(**row))
+
+
+def insert_missing(conn, table, key_columns, rows):
+    """Insert the rows whose key is not in the table yet"""
+    if not rows:
+        return
+    dialect_insert = _dialect_insert(conn)
+    if dialect_insert is not None:
+        conn.execute(dialect_insert(table).on_conflict_do_nothing(index_elements=list(key_columns)), rows)
+        return
+
+    for row in rows:
+        match = and_(*(table.c[column] == row[column] for column in key_columns))
+        if conn.execute(select(1).select_from(table).where(match)).first() is None:
+            conn.execute(table.insert().values(**row))
+
+
+class Schedule:
+    """Tells a periodic job when it is due; safe to ask from several threads"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._last = None
+        self._lock = threading.Lock()
+
+    def due(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._last is not None and now - self._last < self.interval:
+                return False
+            self._last = now
+            return True
@@ -0,0 +1,85 @@
+"""
+Full-text search helpers for the MLOps Learning Platform
+Lesson HTML is reduced to plain text before it is indexed, learner input is
+turned into a safe FTS5 MATCH expression (or a LIKE pattern where FTS5 is
+missing), and FTS5 snippets are escaped for HTML with only the highlight
+marks left as markup.
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+
+# Private-use characters FTS5 puts around matches; they cannot occur in
+# indexed text, so they survive escaping and are swapped for <mark> tags
+HIGHLIGHT_OPEN = '\ue000'
+HIGHLIGHT_CLOSE = '\ue001'
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+_SPACE = re.compile(r'\s+')
+_BLOCK_TAGS = {'p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+               'pre', 'tr', 'td', 'th', 'table', 'section', 'blockquote'}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def strip_html(markup):
+    """Return the visible text of an HTML fragment, whitespace collapsed"""
+    if not markup:
+        return ''
+    extractor = _TextExtractor()
+    extractor.feed(markup)
+    extractor.close()
+    text = ''.join(extractor.parts)
+    text = text.replace(HIGHLIGHT_OPEN, '').replace(HIGHLIGHT_CLOSE, '')
+    return _SPACE.sub(' ', text).strip()
+
+
+def match_expression(query, max_terms=8):
+    """Build an FTS5 MATCH expression requiring every word of query.
+
+    Words are quoted so FTS5 operators typed by learners are taken
+    literally; the last word also matches as a prefix for search-as-you-type.
+    Returns None when query has no searchable words.
+    """
+    terms = _TOKEN.findall(query or '')[:max_terms]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def like_pattern(query, escape='\\'):
+    """A LIKE pattern matching query anywhere, with its % and _ taken literally"""
+    literal = (query.strip().replace(escape, escape * 2)
+               .replace('%', escape + '%').replace('_', escape + '_'))
+    return f'%{literal}%'
+
+
+def highlight(snippet):
+    """Escape an FTS5 snippet for HTML, turning the match markers into <mark>"""
+    return (html.escape(snippet or '')
+            .replace(HIGHLIGHT_OPEN, '<mark>')
+            .replace(HIGHLIGHT_CLOSE, '</mark>'))
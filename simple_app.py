@@ -4,16 +4,117 @@ Simplified MLOps Learning Platform
 This version works without external dependencies for demonstration
 """
 
+import asyncio
+import atexit
+import bisect
+import functools
+import gzip
+import hashlib
+import hmac
+import http.client
+import http.cookies
+import io
 import json
 import os
+import secrets
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import urllib.parse
 
-# Simple in-memory database
-users_db = {}
-progress_db = {}
-current_user = None
+from assets import AssetManifest
+from datastore import open_store
+from httpcache import accepts_gzip, etag_matches, gzip_etag
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics
+from pagination import decode_cursor, split_page
+from prerequisites import PrerequisiteGraph
+
+# Accounts and progress, journaled to DATA_DIR so they survive restarts
+# (STORE_BACKEND=memory keeps them in plain dicts instead)
+store = open_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+atexit.register(store.close)
+users_db = store.table('users')
+progress_db = store.table('progress')
+
+# Passwords are stored as salted PBKDF2-SHA256 hashes, never in clear
+PASSWORD_ITERATIONS = int(os.environ.get('PASSWORD_ITERATIONS', 600000))
+
+# Held while checking a username is free and claiming it
+accounts_lock = threading.Lock()
+
+
+def hash_password(password, iterations=PASSWORD_ITERATIONS):
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f'pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}'
+
+
+def check_password(user, password):
+    """Whether password matches the hash stored for user"""
+    try:
+        scheme, iterations, salt, digest = user['password_hash'].split('$')
+        if scheme != 'pbkdf2_sha256':
+            return False
+        expected = bytes.fromhex(digest)
+        actual = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), int(iterations))
+    except (KeyError, ValueError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def hash_stored_passwords():
+    """Replace passwords saved in clear by older versions with hashes.
+
+    Takes a snapshot afterwards, which deletes the older journal and snapshot
+    files that still hold the clear text.
+    """
+    legacy = [username for username, user in users_db.items() if 'password' in user]
+    for username in legacy:
+        user = dict(users_db[username])
+        user['password_hash'] = hash_password(user.pop('password'))
+        users_db[username] = user
+    if legacy:
+        store.snapshot()
+    return len(legacy)
+
+
+hash_stored_passwords()
+
+SESSION_COOKIE = 'mlops_session'
+
+
+class SessionTable:
+    """Maps opaque session cookies to usernames"""
+
+    def __init__(self, max_sessions=100000):
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, username):
+        session_id = secrets.token_urlsafe(24)
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                # Dicts keep insertion order, so this drops the oldest login
+                self._sessions.pop(next(iter(self._sessions)))
+            self._sessions[session_id] = username
+        return session_id
+
+    def get(self, session_id):
+        if not session_id:
+            return None
+        return self._sessions.get(session_id)
+
+    def end(self, session_id):
+        if session_id:
+            with self._lock:
+                self._sessions.pop(session_id, None)
+
+
+sessions = SessionTable()
 
 # Sample learning content
 MODULES = {
@@ -21,6 +122,8 @@ MODULES = {
         "id": 1,
         "title": "MLOps Fundamentals",
         "level": "beginner",
+        "order_num": 1,
+        "description": "What MLOps is and why it matters",
         "content": """
         <h2>What is MLOps?</h2>
         <p>MLOps (Machine Learning Operations) is a set of practices that combines Machine Learning and DevOps to deploy and maintain ML systems in production reliably and efficiently.</p>
@@ -52,6 +155,9 @@ MODULES = {
         "id": 2,
         "title": "ML Pipeline Basics",
         "level": "beginner",
+        "order_num": 2,
+        "description": "The stages that take raw data to a deployed model",
+        "requires": [1],
         "content": """
         <h2>ML Pipeline Components</h2>
         <p>A typical ML pipeline consists of several interconnected stages:</p>
@@ -75,60 +181,232 @@ MODULES = {
     }
 }
 
+LEVELS = ['beginner', 'intermediate', 'advanced', 'expert']
+
+
+# Module catalogue, served a page at a time from /api/modules in curriculum
+# order: levels by rank, then order_num, with the id breaking ties. The
+# cursor is the (level, order_num, id) of the last module sent.
+CATALOGUE_PAGE_SIZE = int(os.environ.get('CATALOGUE_PAGE_SIZE', 20))
+CATALOGUE_MAX_PAGE_SIZE = 100
+
+
+def catalogue_key(module):
+    return (module['level'], module['order_num'], module['id'])
+
+
+# Sorted once per level, with the keys alongside for bisecting to a cursor
+CATALOGUE = {
+    level: sorted((module for module in MODULES.values() if module['level'] == level), key=catalogue_key)
+    for level in LEVELS
+}
+CATALOGUE_KEYS = {level: [catalogue_key(module) for module in modules] for level, modules in CATALOGUE.items()}
+
+# Checked for cycles at startup; ties keep the catalogue order
+PREREQUISITES = PrerequisiteGraph(
+    [module['id'] for level in LEVELS for module in CATALOGUE[level]],
+    {module['id']: module.get('requires', []) for module in MODULES.values()}
+)
+
+
+def catalogue_page(levels, after=None, limit=CATALOGUE_PAGE_SIZE):
+    """Return up to limit modules of levels after the cursor key, and the next cursor"""
+    if after is not None:
+        levels = levels[levels.index(after[0]):]
+
+    modules = []
+    for level in levels:
+        start = 0
+        if after is not None and after[0] == level:
+            start = bisect.bisect_right(CATALOGUE_KEYS[level], after)
+        modules.extend(CATALOGUE[level][start:start + limit + 1 - len(modules)])
+        if len(modules) > limit:
+            break
+    return split_page(modules, limit, catalogue_key)
+
+
+def catalogue_args(query):
+    """Parse level, limit and cursor from a query string; raise ValueError on bad input"""
+    params = urllib.parse.parse_qs(query)
+    requested = {level for value in params.get('level', []) for level in value.split(',') if level}
+    unknown = requested - set(LEVELS)
+    if unknown:
+        raise ValueError(f'Unknown level: {", ".join(sorted(unknown))}')
+    levels = [level for level in LEVELS if not requested or level in requested]
+
+    try:
+        limit = int(params.get('limit', [CATALOGUE_PAGE_SIZE])[0])
+    except ValueError:
+        limit = CATALOGUE_PAGE_SIZE
+    limit = max(1, min(CATALOGUE_MAX_PAGE_SIZE, limit))
+
+    after = None
+    cursor = params.get('cursor', [''])[0]
+    if cursor:
+        after = decode_cursor(cursor, (str, int, int))
+        if after[0] not in levels:
+            raise ValueError('Cursor does not belong to the requested levels')
+    return levels, after, limit
+
+
+def catalogue_entry(module, completed_modules, completed):
+    return {
+        'id': module['id'],
+        'level': module['level'],
+        'title': module['title'],
+        'description': module['description'],
+        'order_num': module['order_num'],
+        'completed': module['id'] in completed_modules,
+        'unlocked': PREREQUISITES.is_unlocked(module['id'], completed),
+    }
+
+class CachedPage:
+    """A rendered page kept as ready-to-send bytes"""
+
+    __slots__ = ('body', 'gzip_body', 'etag')
+
+    def __init__(self, body, gzip_body, etag):
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = etag
+
+
+class PageCache:
+    """Render-once cache for pages whose HTML does not depend on the user.
+
+    Pages are keyed by name plus an optional variant (e.g. the error message
+    on the login form) and stored pre-encoded, with a strong ETag and, when
+    it pays off, a pre-compressed gzip body (whose bytes get an ETag of their
+    own).
+    """
+
+    def __init__(self, compress=True, min_gzip_size=512):
+        self.compress = compress
+        self.min_gzip_size = min_gzip_size
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        page = self._pages.get(key)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(key)
+                if page is None:
+                    page = self._build(render())
+                    self._pages[key] = page
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def _build(self, html):
+        body = html.encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        gzip_body = None
+        if self.compress and len(body) >= self.min_gzip_size:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                gzip_body = compressed
+        return CachedPage(body, gzip_body, etag)
+
+
+page_cache = PageCache(compress=os.environ.get('PAGE_CACHE_GZIP', '1') != '0')
+
+
+# Fingerprinted static files, served from /static/
+static_assets = AssetManifest(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+
+
+def stylesheet_link():
+    return f'<link rel="stylesheet" href="/static/{static_assets.url_name("simple.css")}">'
+
+
+# Request metrics, served from /metrics
+request_metrics = RequestMetrics(slow_seconds=float(os.environ.get('SLOW_REQUEST_SECONDS', 0.5)))
+
+ROUTES = {'/', '/index.html', '/dashboard', '/login', '/register', '/logout', '/metrics', '/api/modules'}
+
+
+def route_label(path):
+    """Collapse a request path into a bounded set of metric labels"""
+    path = path.split('?', 1)[0]
+    if path in ROUTES:
+        return path
+    if path.startswith('/learn/'):
+        return '/learn/<id>'
+    if path.startswith('/static/'):
+        return '/static/<path>'
+    return '<unmatched>'
+
+
+def instrumented(handler):
+    """Record a do_* method's latency and status in request_metrics"""
+    @functools.wraps(handler)
+    def traced(self):
+        request_metrics.start()
+        try:
+            handler(self)
+        finally:
+            request_metrics.finish(self.command, route_label(self.path))
+    return traced
+
+
 class MLOpsHandler(BaseHTTPRequestHandler):
+    @instrumented
     def do_GET(self):
-        global current_user
+        self.current_user = self.get_session_user()
         
         if self.path == '/' or self.path == '/index.html':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(self.get_homepage().encode())
+            self.send_cached_page(('home', None), self.get_homepage)
             
         elif self.path == '/dashboard':
-            if current_user:
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(self.get_dashboard().encode())
+            if self.current_user:
+                self.send_html(self.get_dashboard())
             else:
                 self.redirect('/login')
                 
         elif self.path == '/login':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(self.get_login_page().encode())
+            self.send_cached_page(('login', None), self.get_login_page)
             
         elif self.path == '/register':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(self.get_register_page().encode())
+            self.send_cached_page(('register', None), self.get_register_page)
             
+        elif self.path.split('?', 1)[0] == '/api/modules':
+            if self.current_user:
+                self.send_catalogue_page(self.path.partition('?')[2])
+            else:
+                self.send_json({'success': False, 'error': 'Login required'}, status=401)
+                
         elif self.path.startswith('/learn/'):
-            if current_user:
+            if self.current_user:
                 module_id = int(self.path.split('/')[-1])
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(self.get_learning_page(module_id).encode())
+                self.send_html(self.get_learning_page(module_id))
             else:
                 self.redirect('/login')
                 
         elif self.path == '/logout':
-            current_user = None
-            self.redirect('/')
+            sessions.end(self.get_session_id())
+            self.redirect('/', cookie=f'{SESSION_COOKIE}=; Path=/; Max-Age=0')
             
-        else:
-            self.send_response(404)
-            self.send_header('Content-type', 'text/html')
+        elif self.path.startswith('/static/'):
+            self.send_asset(self.path[len('/static/'):])
+            
+        elif self.path == '/metrics':
+            body = request_metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-type', METRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            self.wfile.write(b'<h1>404 - Page Not Found</h1>')
+            self.wfile.write(body)
+            
+        else:
+            self.send_html('<h1>404 - Page Not Found</h1>', status=404)
     
+    @instrumented
     def do_POST(self):
-        global current_user
-        content_length = int(self.headers['Content-Length'])
+        self.current_user = self.get_session_user()
+        content_length = int(self.headers.get('Content-Length') or 0)
         post_data = self.rfile.read(content_length)
         params = urllib.parse.parse_qs(post_data.decode())
         
@@ -136,62 +414,171 @@ class MLOpsHandler(BaseHTTPRequestHandler):
             username = params.get('username', [''])[0]
             password = params.get('password', [''])[0]
             
-            if username in users_db and users_db[username]['password'] == password:
-                current_user = username
-                self.redirect('/dashboard')
+            user = users_db.get(username)
+            if user is not None and check_password(user, password):
+                self.start_session(username)
             else:
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(self.get_login_page(error="Invalid credentials").encode())
+                error = "Invalid credentials"
+                self.send_cached_page(('login', error),
+                                      lambda: self.get_login_page(error=error),
+                                      conditional=False)
                 
         elif self.path == '/register':
             username = params.get('username', [''])[0]
             email = params.get('email', [''])[0]
             password = params.get('password', [''])[0]
             
+            error = None
             if username and email and password:
-                users_db[username] = {
-                    'email': email,
-                    'password': password,
-                    'created_at': datetime.now().isoformat(),
-                    'level': 'beginner',
-                    'points': 0
-                }
-                progress_db[username] = {'completed_modules': [], 'current_module': 1}
-                current_user = username
-                self.redirect('/dashboard')
+                # Hashed before taking the lock, which only guards the claim
+                password_hash = hash_password(password)
+                with accounts_lock:
+                    if username in users_db:
+                        error = "Username already taken"
+                    else:
+                        users_db[username] = {
+                            'email': email,
+                            'password_hash': password_hash,
+                            'created_at': datetime.now().isoformat(),
+                            'level': 'beginner',
+                            'points': 0
+                        }
+                        progress_db[username] = {'completed_modules': [], 'current_module': 1}
             else:
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(self.get_register_page(error="Please fill all fields").encode())
+                error = "Please fill all fields"
+            
+            if error is None:
+                self.start_session(username)
+            else:
+                self.send_cached_page(('register', error),
+                                      lambda: self.get_register_page(error=error),
+                                      conditional=False)
+        
+        else:
+            self.send_html('<h1>404 - Page Not Found</h1>', status=404)
+    
+    def send_response(self, code, message=None):
+        trace = request_metrics.current()
+        if trace is not None:
+            trace.status = code
+        super().send_response(code, message)
+    
+    def get_session_id(self):
+        cookie = http.cookies.SimpleCookie()
+        try:
+            cookie.load(self.headers.get('Cookie', ''))
+        except http.cookies.CookieError:
+            return None
+        morsel = cookie.get(SESSION_COOKIE)
+        return morsel.value if morsel else None
     
-    def redirect(self, path):
+    def get_session_user(self):
+        return sessions.get(self.get_session_id())
+    
+    def start_session(self, username):
+        session_id = sessions.create(username)
+        self.current_user = username
+        self.redirect('/dashboard',
+                      cookie=f'{SESSION_COOKIE}={session_id}; Path=/; HttpOnly; SameSite=Lax')
+    
+    def redirect(self, path, cookie=None):
         self.send_response(302)
         self.send_header('Location', path)
+        if cookie:
+            self.send_header('Set-Cookie', cookie)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def send_html(self, html, status=200):
+        body = html.encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_catalogue_page(self, query):
+        try:
+            levels, after, limit = catalogue_args(query)
+        except ValueError as exc:
+            self.send_json({'success': False, 'error': str(exc)}, status=400)
+            return
+        
+        completed_modules = set(progress_db.get(self.current_user, {}).get('completed_modules', ()))
+        completed = PREREQUISITES.mask(completed_modules)
+        modules, next_cursor = catalogue_page(levels, after, limit)
+        self.send_json({
+            'success': True,
+            'levels': levels,
+            'modules': [catalogue_entry(module, completed_modules, completed) for module in modules],
+            'next_cursor': next_cursor,
+        })
+    
+    def send_asset(self, name):
+        asset, immutable = static_assets.lookup(urllib.parse.unquote(name.split('?', 1)[0]))
+        if asset is None:
+            self.send_html('<h1>404 - Page Not Found</h1>', status=404)
+            return
+        
+        status, headers, body = asset.response(immutable, self.headers.get('If-None-Match'),
+                                               self.headers.get('Accept-Encoding'))
+        self.send_response(status)
+        for header, value in headers:
+            self.send_header(header, value)
         self.end_headers()
+        self.wfile.write(body)
+    
+    def send_cached_page(self, key, render, conditional=True):
+        """Send a user-independent page from the render cache.
+
+        GET requests carrying a matching If-None-Match get a bodyless 304.
+        """
+        page = page_cache.get(key, render)
+        
+        body, etag = page.body, page.etag
+        gzipped = page.gzip_body is not None and accepts_gzip(self.headers.get('Accept-Encoding'))
+        if gzipped:
+            body, etag = page.gzip_body, gzip_etag(page.etag)
+        
+        if conditional and etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            if page.gzip_body is not None:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        if page.gzip_body is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        if conditional:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
     
     def get_homepage(self):
-        return """
+        return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <title>MLOps Learning Platform</title>
-            <style>
-                body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; min-height: 100vh; }
-                .container { max-width: 1200px; margin: 0 auto; }
-                .hero { text-align: center; padding: 100px 0; }
-                .hero h1 { font-size: 3em; margin-bottom: 20px; }
-                .hero p { font-size: 1.2em; margin-bottom: 30px; }
-                .btn { background: #ff6b6b; color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; margin: 10px; display: inline-block; font-size: 1.1em; }
-                .btn:hover { background: #ff5252; }
-                .features { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 30px; margin: 50px 0; }
-                .feature { background: rgba(255,255,255,0.1); padding: 30px; border-radius: 10px; text-align: center; }
-                .feature h3 { color: #ff6b6b; }
-            </style>
+            {stylesheet_link()}
         </head>
-        <body>
+        <body class="page-home">
             <div class="container">
                 <div class="hero">
                     <h1>MLOps Learning Platform</h1>
@@ -224,24 +611,15 @@ class MLOpsHandler(BaseHTTPRequestHandler):
         """
     
     def get_login_page(self, error=None):
-        error_msg = f'<div style="color: red; margin: 10px 0;">{error}</div>' if error else ''
+        error_msg = f'<div class="error">{error}</div>' if error else ''
         return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <title>Login - MLOps Learning</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 0; padding: 50px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; min-height: 100vh; display: flex; align-items: center; justify-content: center; }}
-                .login-form {{ background: rgba(255,255,255,0.1); padding: 40px; border-radius: 10px; width: 400px; }}
-                .form-group {{ margin: 20px 0; }}
-                input {{ width: 100%; padding: 12px; border: none; border-radius: 5px; font-size: 16px; }}
-                .btn {{ background: #ff6b6b; color: white; padding: 15px; border: none; border-radius: 5px; width: 100%; font-size: 16px; cursor: pointer; }}
-                .btn:hover {{ background: #ff5252; }}
-                .links {{ text-align: center; margin-top: 20px; }}
-                .links a {{ color: white; text-decoration: none; }}
-            </style>
+            {stylesheet_link()}
         </head>
-        <body>
+        <body class="page-form">
             <div class="login-form">
                 <h2 style="text-align: center;">Login to MLOps Learning</h2>
                 {error_msg}
@@ -263,24 +641,15 @@ class MLOpsHandler(BaseHTTPRequestHandler):
         """
     
     def get_register_page(self, error=None):
-        error_msg = f'<div style="color: red; margin: 10px 0;">{error}</div>' if error else ''
+        error_msg = f'<div class="error">{error}</div>' if error else ''
         return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <title>Register - MLOps Learning</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 0; padding: 50px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; min-height: 100vh; display: flex; align-items: center; justify-content: center; }}
-                .register-form {{ background: rgba(255,255,255,0.1); padding: 40px; border-radius: 10px; width: 400px; }}
-                .form-group {{ margin: 20px 0; }}
-                input {{ width: 100%; padding: 12px; border: none; border-radius: 5px; font-size: 16px; }}
-                .btn {{ background: #ff6b6b; color: white; padding: 15px; border: none; border-radius: 5px; width: 100%; font-size: 16px; cursor: pointer; }}
-                .btn:hover {{ background: #ff5252; }}
-                .links {{ text-align: center; margin-top: 20px; }}
-                .links a {{ color: white; text-decoration: none; }}
-            </style>
+            {stylesheet_link()}
         </head>
-        <body>
+        <body class="page-form">
             <div class="register-form">
                 <h2 style="text-align: center;">Join MLOps Learning</h2>
                 {error_msg}
@@ -305,30 +674,38 @@ class MLOpsHandler(BaseHTTPRequestHandler):
         """
     
     def get_dashboard(self):
+        current_user = self.current_user
         user_data = users_db.get(current_user, {})
         progress = progress_db.get(current_user, {'completed_modules': [], 'current_module': 1})
+        completed_modules = set(progress['completed_modules'])
+        completed = PREREQUISITES.mask(completed_modules)
+        up_next = PREREQUISITES.recommend(completed)
+        up_next = MODULES[up_next[0]] if up_next else None
+        
+        # The first page is rendered here; the rest come from /api/modules
+        modules, next_cursor = catalogue_page(LEVELS)
+        cards = []
+        for module in modules:
+            done = module['id'] in completed_modules
+            status = "Completed" if done else "Available" if PREREQUISITES.is_unlocked(module['id'], completed) else "Locked"
+            cards.append(f"""
+                    <div class="module">
+                        <h3>{module['title']}</h3>
+                        <p><strong>Level:</strong> {module['level'].title()}</p>
+                        <p><strong>Status:</strong> {status}</p>
+                        <p><strong>Description:</strong> {module['description']}</p>
+                        <a href="/learn/{module['id']}" class="btn">{"Review" if done else "Start Learning"}</a>
+                    </div>
+            """)
         
         return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <title>Dashboard - MLOps Learning</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; min-height: 100vh; }}
-                .container {{ max-width: 1200px; margin: 0 auto; }}
-                .header {{ background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px; margin-bottom: 30px; }}
-                .nav {{ margin-bottom: 30px; }}
-                .nav a {{ color: white; text-decoration: none; margin-right: 20px; background: rgba(255,255,255,0.2); padding: 10px 20px; border-radius: 5px; }}
-                .modules {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(350px, 1fr)); gap: 20px; }}
-                .module {{ background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px; }}
-                .module h3 {{ color: #ff6b6b; }}
-                .btn {{ background: #ff6b6b; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; display: inline-block; margin-top: 10px; }}
-                .btn:hover {{ background: #ff5252; }}
-                .stats {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-                .stat {{ background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px; text-align: center; }}
-            </style>
+            {stylesheet_link()}
         </head>
-        <body>
+        <body class="page-dashboard">
             <div class="container">
                 <div class="header">
                     <h1>Welcome back, {current_user}!</h1>
@@ -345,7 +722,7 @@ class MLOpsHandler(BaseHTTPRequestHandler):
                         <p>Total Points</p>
                     </div>
                     <div class="stat">
-                        <h3>{len(progress['completed_modules'])}</h3>
+                        <h3>{len(completed_modules)}</h3>
                         <p>Modules Completed</p>
                     </div>
                     <div class="stat">
@@ -354,45 +731,60 @@ class MLOpsHandler(BaseHTTPRequestHandler):
                     </div>
                 </div>
                 
+                {f'<p><strong>Up next:</strong> <a href="/learn/{up_next["id"]}">{up_next["title"]}</a></p>' if up_next else ''}
+                
                 <h2>Learning Modules</h2>
-                <div class="modules">
-        """
-        
-        # Debug: Show total modules count and content
-        total_modules = len(MODULES)
-        dashboard_html += f"<p><strong>Total Modules Available: {total_modules}</strong></p>"
-        dashboard_html += f"<p><strong>MODULES keys: {list(MODULES.keys())}</strong></p>"
-        
-        for module_id, module in MODULES.items():
-            completed = module_id in progress['completed_modules']
-            status = "Completed" if completed else "Available"
-            button_text = "Review" if completed else "Start Learning"
-            
-            dashboard_html += f"""
-                    <div class="module">
-                        <h3>{module['title']}</h3>
-                        <p><strong>Level:</strong> {module['level'].title()}</p>
-                        <p><strong>Status:</strong> {status}</p>
-                        <p><strong>Description:</strong> {module['description']}</p>
-                        <a href="/learn/{module_id}" class="btn">{button_text}</a>
-                    </div>
-            """
-        
-        dashboard_html += """
+                <div class="modules" id="modules">
+                    {"".join(cards)}
                 </div>
+                <button id="more-modules" class="btn" data-cursor="{next_cursor or ''}"{"" if next_cursor else " hidden"}>Load more modules</button>
             </div>
+            
+            <script>
+                const moreButton = document.getElementById('more-modules');
+                
+                function moduleCard(module) {{
+                    const card = document.createElement('div');
+                    card.className = 'module';
+                    const title = document.createElement('h3');
+                    title.textContent = module.title;
+                    const level = document.createElement('p');
+                    level.textContent = 'Level: ' + module.level.charAt(0).toUpperCase() + module.level.slice(1);
+                    const status = document.createElement('p');
+                    status.textContent = 'Status: ' + (module.completed ? 'Completed' : module.unlocked ? 'Available' : 'Locked');
+                    const description = document.createElement('p');
+                    description.textContent = 'Description: ' + module.description;
+                    const link = document.createElement('a');
+                    link.href = '/learn/' + module.id;
+                    link.className = 'btn';
+                    link.textContent = module.completed ? 'Review' : 'Start Learning';
+                    card.append(title, level, status, description, link);
+                    return card;
+                }}
+                
+                moreButton.addEventListener('click', () => {{
+                    moreButton.disabled = true;
+                    fetch('/api/modules?cursor=' + encodeURIComponent(moreButton.dataset.cursor))
+                    .then(response => response.json())
+                    .then(data => {{
+                        const list = document.getElementById('modules');
+                        data.modules.forEach(module => list.appendChild(moduleCard(module)));
+                        moreButton.dataset.cursor = data.next_cursor || '';
+                        moreButton.hidden = !data.next_cursor;
+                    }})
+                    .finally(() => {{ moreButton.disabled = false; }});
+                }});
+            </script>
         </body>
         </html>
         """
-        
-        return dashboard_html
     
     def get_learning_page(self, module_id):
         module = MODULES.get(module_id, {})
         if not module:
             return "<h1>Module not found</h1>"
         
-        progress = progress_db.get(current_user, {'completed_modules': [], 'current_module': 1})
+        progress = progress_db.get(self.current_user, {'completed_modules': [], 'current_module': 1})
         completed = module_id in progress['completed_modules']
         
         return f"""
@@ -400,23 +792,9 @@ class MLOpsHandler(BaseHTTPRequestHandler):
         <html>
         <head>
             <title>{module['title']} - MLOps Learning</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; min-height: 100vh; }}
-                .container {{ max-width: 1000px; margin: 0 auto; }}
-                .header {{ background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px; margin-bottom: 30px; }}
-                .nav {{ margin-bottom: 20px; }}
-                .nav a {{ color: white; text-decoration: none; margin-right: 20px; background: rgba(255,255,255,0.2); padding: 10px 20px; border-radius: 5px; }}
-                .content {{ background: rgba(255,255,255,0.1); padding: 30px; border-radius: 10px; margin-bottom: 20px; }}
-                .resources {{ background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px; }}
-                .btn {{ background: #ff6b6b; color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; display: inline-block; margin: 10px 0; }}
-                .btn:hover {{ background: #ff5252; }}
-                .resource-link {{ color: #ff6b6b; text-decoration: none; }}
-                .resource-link:hover {{ text-decoration: underline; }}
-                h2 {{ color: #ff6b6b; }}
-                h3 {{ color: #ffd93d; }}
-            </style>
+            {stylesheet_link()}
         </head>
-        <body>
+        <body class="page-learn">
             <div class="container">
                 <div class="header">
                     <h1>{module['title']}</h1>
@@ -457,10 +835,208 @@ class MLOpsHandler(BaseHTTPRequestHandler):
         </html>
         """
 
+class BufferedHandler(MLOpsHandler):
+    """Runs the MLOpsHandler routes against an in-memory request.
+
+    The asyncio front-end owns the socket; this handler only parses the
+    request head it is given and returns the serialized response bytes.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    access_log = os.environ.get('ACCESS_LOG', '1') != '0'
+
+    def __init__(self, head, client_address):
+        # BaseHTTPRequestHandler.__init__ would read from a socket, so it is
+        # deliberately not called
+        request_line, _, header_block = head.partition(b'\r\n')
+        self.client_address = client_address
+        self.raw_requestline = request_line + b'\r\n'
+        self.rfile = io.BytesIO(header_block)
+        self.wfile = io.BytesIO()
+        self.close_connection = True
+        self.current_user = None
+
+    def handle_expect_100(self):
+        # The front-end answers 100-continue itself before reading the body
+        return True
+
+    def log_request(self, code='-', size='-'):
+        if self.access_log:
+            super().log_request(code, size)
+
+    def dispatch(self, body):
+        self.rfile = io.BytesIO(body)
+        method = getattr(self, 'do_' + self.command, None)
+        if method is None:
+            self.send_error(501, f"Unsupported method ({self.command!r})")
+            return self.wfile.getvalue()
+        
+        try:
+            method()
+        except Exception as exc:
+            self.log_error("Error handling %s: %r", self.path, exc)
+            self.wfile = io.BytesIO()
+            self._headers_buffer = []
+            self.send_error(500)
+        return self.wfile.getvalue()
+
+
+SERVICE_UNAVAILABLE = (b'HTTP/1.1 503 Service Unavailable\r\n'
+                       b'Content-Length: 0\r\nRetry-After: 1\r\n'
+                       b'Connection: close\r\n\r\n')
+
+
+class AsyncMLOpsServer:
+    """Single-threaded asyncio HTTP/1.1 front-end for the MLOpsHandler routes.
+
+    Connections are kept alive until idle for keepalive_timeout seconds. At
+    most max_inflight requests are dispatched and flushed at once, and
+    connections beyond max_connections are turned away with 503 rather
+    than queued. POST routes hash passwords and write the journal, which
+    would stall every connection if done on the loop, so they run on a pool
+    of blocking_threads threads (PBKDF2 and fsync release the GIL).
+    """
+
+    def __init__(self, host='0.0.0.0', port=8000, max_connections=10000,
+                 max_inflight=256, keepalive_timeout=15.0,
+                 max_header_size=65536, max_body_size=1024 * 1024,
+                 blocking_threads=4):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.max_inflight = max_inflight
+        self.keepalive_timeout = keepalive_timeout
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.blocking_threads = blocking_threads
+        self.connections = 0
+        self.server = None
+        self._inflight = None
+        self._blocking = None
+
+    async def start(self):
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._blocking = ThreadPoolExecutor(self.blocking_threads, thread_name_prefix='blocking')
+        self.server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port,
+            limit=self.max_header_size, backlog=1024
+        )
+        return self.server
+
+    async def serve_forever(self):
+        server = await self.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._blocking.shutdown(wait=False)
+
+    async def _handle_connection(self, reader, writer):
+        if self.connections >= self.max_connections:
+            writer.write(SERVICE_UNAVAILABLE)
+            writer.close()
+            return
+        
+        self.connections += 1
+        peer = writer.get_extra_info('peername') or ('-', 0)
+        try:
+            while await self._handle_request(reader, writer, peer[:2]):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _handle_request(self, reader, writer, peer):
+        """Serve one request; return True if the connection stays open"""
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'),
+                                      self.keepalive_timeout)
+        handler = BufferedHandler(head, peer)
+        if not handler.parse_request():
+            writer.write(handler.wfile.getvalue())
+            await writer.drain()
+            return False
+        
+        if 'Transfer-Encoding' in handler.headers:
+            handler.send_error(411)
+            writer.write(handler.wfile.getvalue())
+            await writer.drain()
+            return False
+        
+        try:
+            length = int(handler.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > self.max_body_size:
+            handler.send_error(400 if length < 0 else 413)
+            writer.write(handler.wfile.getvalue())
+            await writer.drain()
+            return False
+        
+        body = b''
+        if length:
+            if handler.headers.get('Expect', '').lower() == '100-continue':
+                writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            body = await asyncio.wait_for(reader.readexactly(length),
+                                          self.keepalive_timeout)
+        
+        async with self._inflight:
+            if handler.command == 'POST':
+                response = await asyncio.get_running_loop().run_in_executor(
+                    self._blocking, handler.dispatch, body
+                )
+            else:
+                response = handler.dispatch(body)
+            writer.write(response)
+            await writer.drain()
+        return not handler.close_connection
+
+
+class ThreadedMLOpsServer(ThreadingHTTPServer):
+    """Threaded HTTP server for the MLOpsHandler routes.
+
+    Each connection gets its own thread, so one login's password hash does
+    not hold up everyone else's requests.
+    """
+
+    daemon_threads = True
+    # The default backlog of 5 makes a burst of new connections wait out
+    # SYN retries
+    request_queue_size = 1024
+
+
+def run_http_server(port):
+    server = ThreadedMLOpsServer(('0.0.0.0', port), MLOpsHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped. Thanks for using MLOps Learning Platform!")
+        server.shutdown()
+
+
+def run_async_server(port):
+    server = AsyncMLOpsServer(
+        port=port,
+        max_connections=int(os.environ.get('MAX_CONNECTIONS', 10000)),
+        max_inflight=int(os.environ.get('MAX_INFLIGHT', 256)),
+        keepalive_timeout=float(os.environ.get('KEEPALIVE_TIMEOUT', 15)),
+        blocking_threads=int(os.environ.get('BLOCKING_THREADS', 4)),
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nServer stopped. Thanks for using MLOps Learning Platform!")
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
-    server = HTTPServer(('0.0.0.0', port), MLOpsHandler)
-    print(f"MLOps Learning Platform running on http://localhost:{port}")
+    server_mode = os.environ.get('SERVER_MODE', 'http')
+    if '--async' in sys.argv[1:]:
+        server_mode = 'asyncio'
+    
+    print(f"MLOps Learning Platform running on http://localhost:{port} ({server_mode} server)")
     print("Features:")
     print("   - User registration and login")
     print("   - Learning modules with content")
@@ -473,8 +1049,11 @@ if __name__ == '__main__':
     print("   Username: student1, Email: student1@example.com")
     print("   Username: mlops_user, Email: user@mlops.com")
     
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        print("\nServer stopped. Thanks for using MLOps Learning Platform!")
-        server.shutdown()
+    # Exit normally on SIGTERM (as sent by Render/Heroku) so the store is
+    # snapshotted and the next start has no journal to replay
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    if server_mode == 'asyncio':
+        run_async_server(port)
+    else:
+        run_http_server(port)